@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import User
+from .models import EmailOutbox, User
 
 
 # Register your models here.
@@ -14,4 +14,10 @@ class UserAdmin(admin.ModelAdmin):
         "is_active",
     )
 
-admin.site.register(User, UserAdmin)
\ No newline at end of file
+admin.site.register(User, UserAdmin)
+
+class EmailOutboxAdmin(admin.ModelAdmin):
+    list_display = ("id", "subject", "to", "status", "attempts", "next_attempt_at", "sent_at")
+    list_filter = ("status",)
+
+admin.site.register(EmailOutbox, EmailOutboxAdmin)
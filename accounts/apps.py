@@ -3,3 +3,12 @@ from django.apps import AppConfig
 
 class AccountsConfig(AppConfig):
     name = 'accounts'
+
+    def ready(self):
+        from django.db.models.signals import post_delete, post_save
+
+        from .authentication import invalidate_cached_user
+
+        # deactivated users and changed passwords must not outlive the save
+        post_save.connect(invalidate_cached_user, sender=self.get_model("User"))
+        post_delete.connect(invalidate_cached_user, sender=self.get_model("User"))
@@ -1,23 +1,128 @@
-from rest_framework_simplejwt.authentication import JWTAuthentication
+"""
+JWT authentication from the Authorization header or the access cookie.
+
+Resolving the user of a token costs a query per request. CustomJWTAuthentication keeps
+the columns of recently authenticated users in a small in-process cache (UserCache):
+AUTH_USER_CACHE_SIZE users, each for AUTH_USER_CACHE_SECONDS. Saving or deleting a
+user evicts it in the process that made the change; other workers notice a
+deactivation or a password change when their entry expires, and so do
+QuerySet.update() calls, which send no signals.
+
+Views that only read and don't look at the user beyond its id can skip the lookup
+entirely: HTTP methods listed in their `stateless_auth_methods` attribute authenticate
+with a TokenUser built from the token claims. Such requests are accepted until the
+token expires even if the user was deactivated in the meantime.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
 from django.conf import settings
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+
+class UserCache:
+    """Least recently used users' column values by id, expiring after a while"""
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            expires, values = entry
+            if expires <= time.monotonic():
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+            return values
+
+    def set(self, user_id, values):
+        timeout = settings.AUTH_USER_CACHE_SECONDS
+        if timeout <= 0:
+            return
+        with self._lock:
+            self._entries[user_id] = (time.monotonic() + timeout, values)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > settings.AUTH_USER_CACHE_SIZE:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+USER_CACHE = UserCache()
 
 
 class CustomJWTAuthentication(JWTAuthentication):
     def authenticate(self, request):
+        # malformed headers, invalid or expired tokens and unknown or inactive users
+        # are anonymous
         try:
             header = self.get_header(request)
-
             if header is None:
                 raw_token = request.COOKIES.get(settings.AUTH_COOKIE)
             else:
                 raw_token = self.get_raw_token(header)
-
             if raw_token is None:
                 return None
 
             validated_token = self.get_validated_token(raw_token)
-
+            if self.is_stateless(request):
+                return self.get_token_user(validated_token), validated_token
             return self.get_user(validated_token), validated_token
-        except:
+        except (InvalidToken, AuthenticationFailed):
             return None
-        return super().authenticate(request)
+
+    def is_stateless(self, request):
+        # DRF requests carry their view, the profiling middleware passes a plain one
+        context = getattr(request, "parser_context", None) or {}
+        view = context.get("view")
+        return request.method in getattr(view, "stateless_auth_methods", ())
+
+    def get_token_user(self, validated_token):
+        if api_settings.USER_ID_CLAIM not in validated_token:
+            raise InvalidToken("Token contained no recognizable user identification")
+        return api_settings.TOKEN_USER_CLASS(validated_token)
+
+    def get_user(self, validated_token):
+        # tokens carry the id as a string
+        user_id = str(validated_token.get(api_settings.USER_ID_CLAIM))
+        cached = USER_CACHE.get(user_id)
+        if cached is None:
+            user = super().get_user(validated_token)
+            USER_CACHE.set(user_id, (user._state.db, self.column_values(user)))
+            return user
+
+        db, values = cached
+        user = self.user_model.from_db(db, self.column_names(), values)
+        # only active users are cached; the token may predate a password change
+        if api_settings.CHECK_REVOKE_TOKEN and validated_token.get(
+            api_settings.REVOKE_TOKEN_CLAIM
+        ) != get_md5_hash_password(user.password):
+            raise AuthenticationFailed(
+                "The user's password has been changed.", code="password_changed"
+            )
+        return user
+
+    def column_names(self):
+        return [field.attname for field in self.user_model._meta.concrete_fields]
+
+    def column_values(self, user):
+        return tuple(getattr(user, name) for name in self.column_names())
+
+
+def invalidate_cached_user(sender, instance, **kwargs):
+    USER_CACHE.invalidate(str(getattr(instance, api_settings.USER_ID_FIELD)))
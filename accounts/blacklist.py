@@ -0,0 +1,202 @@
+"""
+Refresh token blacklist maintenance and fast blacklist checks.
+
+With ROTATE_REFRESH_TOKENS and BLACKLIST_AFTER_ROTATION every refresh adds an
+OutstandingToken and a BlacklistedToken row and first checks the blacklist with a
+query. purge_expired_tokens() deletes expired rows in batches (see the
+purge_expired_tokens command); expired tokens are rejected whether they are blacklisted
+or not.
+
+RefreshToken checks a per-process bloom filter of the blacklisted jtis first and only
+queries the database when the filter reports a possible match (roughly
+FALSE_POSITIVE_RATE of unknown tokens). The filter is rebuilt from the unexpired
+blacklisted tokens every TOKEN_BLACKLIST_REBUILD_INTERVAL seconds, or earlier once it
+holds more tokens than it was sized for. One thread reads the table without holding
+the lock and swaps the new filter in; meanwhile the others keep checking the old one
+(or the database, before the first filter exists). In between, tokens blacklisted by
+other workers are added every TOKEN_BLACKLIST_SYNC_INTERVAL seconds with a query
+reading the BlacklistedToken rows above the highest id seen SYNC_OVERLAP_SECONDS
+earlier, so rows committed out of id order are picked up too. Tokens blacklisted by this process
+are added right away, so a token rotated on another worker can be refreshed again
+until the next sync. A TOKEN_BLACKLIST_SYNC_INTERVAL of 0 turns the filter off.
+"""
+
+import hashlib
+import math
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import (
+    BlacklistedToken,
+    OutstandingToken,
+)
+from rest_framework_simplejwt.tokens import RefreshToken as BaseRefreshToken
+from rest_framework_simplejwt.utils import aware_utcnow
+
+FALSE_POSITIVE_RATE = 0.01
+MIN_CAPACITY = 10_000
+SYNC_OVERLAP_SECONDS = 30
+
+
+class BloomFilter:
+    """Set membership with false positives but no false negatives"""
+
+    def __init__(self, capacity, false_positive_rate=FALSE_POSITIVE_RATE):
+        self.capacity = capacity
+        self.size = math.ceil(-capacity * math.log(false_positive_rate) / math.log(2) ** 2)
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key):
+        # double hashing: k positions from the two halves of one digest
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        step = int.from_bytes(digest[8:], "little") | 1
+        return [(first + index * step) % self.size for index in range(self.hashes)]
+
+    def add(self, key):
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key):
+        return all(
+            self.bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(key)
+        )
+
+
+class BlacklistFilter:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._bloom = None
+        self._built_at = 0.0
+        self._synced_at = 0.0
+        # (monotonic time, highest BlacklistedToken id seen then)
+        self._watermarks = deque()
+        # one thread rebuilds without the lock, the others keep using the old filter
+        self._rebuilding = False
+        self._added_while_rebuilding = []
+
+    def might_contain(self, jti):
+        now = time.monotonic()
+        with self._lock:
+            rebuild = not self._rebuilding and (
+                self._bloom is None
+                or now - self._built_at >= settings.TOKEN_BLACKLIST_REBUILD_INTERVAL
+                or self._bloom.count > self._bloom.capacity
+            )
+            if not rebuild:
+                if self._bloom is None:
+                    # the first filter is still being built, ask the database
+                    return True
+                if now - self._synced_at >= settings.TOKEN_BLACKLIST_SYNC_INTERVAL:
+                    self._sync(now)
+                return jti in self._bloom
+            self._rebuilding = True
+
+        try:
+            bloom, highest = self._build()
+        except BaseException:
+            with self._lock:
+                self._rebuilding = False
+                self._added_while_rebuilding.clear()
+            raise
+
+        with self._lock:
+            self._rebuilding = False
+            for added_jti in self._added_while_rebuilding:
+                bloom.add(added_jti)
+            self._added_while_rebuilding.clear()
+            self._bloom = bloom
+            self._built_at = self._synced_at = now
+            self._watermarks.clear()
+            self._watermarks.append((now, highest))
+            return jti in bloom
+
+    def add(self, jti):
+        with self._lock:
+            if self._bloom is not None:
+                self._bloom.add(jti)
+            if self._rebuilding:
+                self._added_while_rebuilding.append(jti)
+
+    def reset(self):
+        with self._lock:
+            self._bloom = None
+            self._watermarks.clear()
+
+    def _build(self):
+        # read the watermark first: rows inserted while the filter is filled are
+        # read again by the next sync
+        highest = BlacklistedToken.objects.aggregate(highest=Max("id"))["highest"] or 0
+        live = BlacklistedToken.objects.filter(token__expires_at__gt=aware_utcnow())
+        bloom = BloomFilter(max(MIN_CAPACITY, 2 * live.count()))
+        for jti in live.order_by().values_list("token__jti", flat=True).iterator(
+            chunk_size=10_000
+        ):
+            bloom.add(jti)
+        return bloom, highest
+
+    def _sync(self, now):
+        # the newest watermark at least SYNC_OVERLAP_SECONDS old, or the oldest one
+        overlap_start = now - SYNC_OVERLAP_SECONDS
+        while len(self._watermarks) > 1 and self._watermarks[1][0] <= overlap_start:
+            self._watermarks.popleft()
+        low = self._watermarks[0][1]
+
+        highest = self._watermarks[-1][1]
+        for row_id, jti in BlacklistedToken.objects.filter(id__gt=low).values_list(
+            "id", "token__jti"
+        ):
+            self._bloom.add(jti)
+            highest = max(highest, row_id)
+
+        self._synced_at = now
+        self._watermarks.append((now, highest))
+
+
+BLACKLIST_FILTER = BlacklistFilter()
+
+
+class RefreshToken(BaseRefreshToken):
+    def check_blacklist(self):
+        if settings.TOKEN_BLACKLIST_SYNC_INTERVAL > 0:
+            jti = self.payload[api_settings.JTI_CLAIM]
+            if not BLACKLIST_FILTER.might_contain(jti):
+                return
+        super().check_blacklist()
+
+    def blacklist(self):
+        blacklisted = super().blacklist()
+        BLACKLIST_FILTER.add(self.payload[api_settings.JTI_CLAIM])
+        return blacklisted
+
+
+def purge_expired_tokens(batch_size=1000, now=None):
+    """
+    Delete outstanding tokens that expired before `now` with their blacklist entries.
+    Works in batches so the purge doesn't hold one long write transaction.
+    """
+    now = now or aware_utcnow()
+    # walk the primary key: expired tokens are the oldest rows
+    expired = OutstandingToken.objects.filter(expires_at__lte=now).order_by("id")
+
+    purged = 0
+    while True:
+        with transaction.atomic():
+            ids = list(expired.values_list("id", flat=True)[:batch_size])
+            if not ids:
+                break
+            BlacklistedToken.objects.filter(token_id__in=ids).delete()
+            # without the token text, the rows are only loaded for the delete signals
+            OutstandingToken.objects.filter(id__in=ids).only("id").delete()
+        purged += len(ids)
+
+    return purged
@@ -1,8 +1,31 @@
+from django.conf import settings
 from djoser import email
 
+from .models import EmailOutbox
 
-class CustomActivationEmail(email.ActivationEmail):
-    html_template_name = "templates/emails/activation.html" 
+
+class OutboxEmailMixin:
+    """
+    Renders the email in the request but queues it in EmailOutbox instead of talking
+    to the mail server; `manage.py send_outbox_emails` sends it (see outbox.py).
+    The row is written in the caller's transaction, a rolled back registration
+    doesn't send anything.
+    """
+
+    def send(self, to, fail_silently=False, **kwargs):
+        self.render()
+        return EmailOutbox.objects.create(
+            from_email=kwargs.get("from_email") or settings.DEFAULT_FROM_EMAIL or "",
+            to=list(to),
+            subject=self.subject,
+            # html only emails have their html as body, see BaseEmailMessage._attach_body
+            body="" if self.content_subtype == "html" else self.body,
+            html=self.html or "",
+        )
+
+
+class CustomActivationEmail(OutboxEmailMixin, email.ActivationEmail):
+    html_template_name = "templates/emails/activation.html"
 
     def get_context_data(self):
         context = super().get_context_data()
@@ -14,3 +37,17 @@ class CustomActivationEmail(email.ActivationEmail):
         context["company_address"] = "123 Main St, Dar es Salaam, Tanzania"
 
         return context
+
+
+class ConfirmationEmail(OutboxEmailMixin, email.ConfirmationEmail):
+    pass
+
+
+class PasswordResetEmail(OutboxEmailMixin, email.PasswordResetEmail):
+    pass
+
+
+class PasswordChangedConfirmationEmail(
+    OutboxEmailMixin, email.PasswordChangedConfirmationEmail
+):
+    pass
@@ -0,0 +1,41 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from accounts.outbox import send_due_emails
+
+
+class Command(BaseCommand):
+    help = "Send the queued account emails (activation, password reset, ...)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=50,
+            help="Number of emails sent over one mail server connection",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=None,
+            help="Keep running, polling for due emails every INTERVAL seconds",
+        )
+
+    def handle(self, *args, **options):
+        total_sent = total_failed = 0
+        while True:
+            sent, failed = send_due_emails(batch_size=options["batch_size"])
+            total_sent += sent
+            total_failed += failed
+            if sent or failed:
+                self.stdout.write(f"Sent {sent} emails, {failed} failed")
+            if sent + failed == options["batch_size"]:
+                continue  # more may be due
+            if options["interval"] is None:
+                break
+            time.sleep(options["interval"])
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Sent {total_sent} emails, {total_failed} failed")
+        )
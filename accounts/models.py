@@ -1,6 +1,7 @@
 from django.db import models
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager
 from django.core.exceptions import ValidationError
+from django.utils import timezone
 
 
 class UserManager(BaseUserManager):
@@ -55,3 +56,35 @@ class User(AbstractBaseUser):
 
     def __str__(self):
         return f"{self.first_name} | {self.email}"
+
+
+class EmailOutbox(models.Model):
+    """Rendered emails waiting for `manage.py send_outbox_emails` (see accounts/outbox.py)"""
+
+    STATUS_CHOICES = [
+        ("PENDING", "Pending"),
+        ("SENT", "Sent"),
+        ("FAILED", "Failed"),
+    ]
+
+    from_email = models.CharField(max_length=255)
+    to = models.JSONField()
+    subject = models.CharField(max_length=255)
+    body = models.TextField(blank=True)  # plain text part
+    html = models.TextField(blank=True)
+
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="PENDING")
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # the worker polls for due pending emails
+            models.Index(fields=["status", "next_attempt_at"]),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} → {', '.join(self.to)} ({self.status})"
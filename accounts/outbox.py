@@ -0,0 +1,93 @@
+"""
+Sending the emails queued in EmailOutbox.
+
+send_due_emails() claims up to `batch_size` due PENDING emails, sends them over one
+connection of EMAIL_BACKEND and records the outcome. Claiming pushes next_attempt_at
+LEASE_SECONDS ahead in a short transaction (rows locked by another worker are skipped
+on PostgreSQL), so emails of a worker that died mid-batch are retried once the lease
+ran out. A failed email is retried after RETRY_BASE_SECONDS, doubling up to
+RETRY_MAX_SECONDS, and marked FAILED after MAX_ATTEMPTS attempts.
+"""
+
+from datetime import timedelta
+
+from django.core import mail
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import EmailOutbox
+
+LEASE_SECONDS = 300
+RETRY_BASE_SECONDS = 60
+RETRY_MAX_SECONDS = 3600
+MAX_ATTEMPTS = 8
+
+
+def retry_delay(attempts):
+    return timedelta(seconds=min(RETRY_BASE_SECONDS * 2 ** (attempts - 1), RETRY_MAX_SECONDS))
+
+
+def claim_due_emails(batch_size, now):
+    with transaction.atomic():
+        ids = list(
+            EmailOutbox.objects.filter(status="PENDING", next_attempt_at__lte=now)
+            .order_by("next_attempt_at")
+            .select_for_update(skip_locked=True)
+            .values_list("id", flat=True)[:batch_size]
+        )
+        EmailOutbox.objects.filter(id__in=ids).update(
+            attempts=F("attempts") + 1,
+            next_attempt_at=now + timedelta(seconds=LEASE_SECONDS),
+        )
+    return list(EmailOutbox.objects.filter(id__in=ids).order_by("id"))
+
+
+def build_message(entry, connection):
+    message = mail.EmailMultiAlternatives(
+        entry.subject, entry.body, entry.from_email, entry.to, connection=connection
+    )
+    if entry.body and entry.html:
+        message.attach_alternative(entry.html, "text/html")
+    elif entry.html:
+        message.body = entry.html
+        message.content_subtype = "html"
+    return message
+
+
+def send_due_emails(batch_size=50, now=None):
+    """Send one batch of due emails, returns the (sent, failed) counts"""
+    now = now or timezone.now()
+    entries = claim_due_emails(batch_size, now)
+    if not entries:
+        return 0, 0
+
+    sent = failed = 0
+    connection = mail.get_connection()
+    try:
+        for entry in entries:
+            try:
+                # no-op while open; send_messages() closes connections it opened
+                connection.open()
+                connection.send_messages([build_message(entry, connection)])
+            except Exception as exc:
+                # the connection may be broken, the next message opens a new one
+                connection.close()
+                failed += 1
+                entry.last_error = f"{type(exc).__name__}: {exc}"
+                if entry.attempts >= MAX_ATTEMPTS:
+                    entry.status = "FAILED"
+                else:
+                    entry.next_attempt_at = timezone.now() + retry_delay(entry.attempts)
+                entry.save(update_fields=["status", "next_attempt_at", "last_error"])
+                continue
+
+            sent += 1
+            entry.status = "SENT"
+            entry.sent_at = timezone.now()
+            entry.last_error = ""
+            entry.save(update_fields=["status", "sent_at", "last_error"])
+    finally:
+        connection.close()
+
+    return sent, failed
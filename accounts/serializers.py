@@ -1,5 +1,10 @@
 from djoser.serializers import UserSerializer
 from django.contrib.auth import get_user_model
+from rest_framework_simplejwt.serializers import (
+    TokenRefreshSerializer as BaseTokenRefreshSerializer,
+)
+
+from .blacklist import RefreshToken
 
 
 class CustomUserSerializer(UserSerializer):
@@ -14,3 +19,8 @@ class CustomUserSerializer(UserSerializer):
             "phone",
         ]
         read_only_fields = ["id"]
+
+
+class TokenRefreshSerializer(BaseTokenRefreshSerializer):
+    # checks the blacklist through the in-process filter (see blacklist.py)
+    token_class = RefreshToken
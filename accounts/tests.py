@@ -1,3 +1,229 @@
-from django.test import TestCase
+import threading
+from datetime import timedelta
+from smtplib import SMTPServerDisconnected
+from unittest import mock
 
-# Create your tests here.
+from django.core import mail
+from django.core.mail.backends.base import BaseEmailBackend
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from rest_framework.request import Request
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.token_blacklist.models import (
+    BlacklistedToken,
+    OutstandingToken,
+)
+from rest_framework_simplejwt.tokens import AccessToken
+from rest_framework_simplejwt.utils import aware_utcnow
+
+from api.views import SearchRouteView
+
+from .authentication import USER_CACHE, CustomJWTAuthentication
+from .blacklist import BLACKLIST_FILTER, BloomFilter, RefreshToken, purge_expired_tokens
+from .models import EmailOutbox, User
+from .outbox import send_due_emails
+
+
+class CachedUserAuthenticationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email="cache@example.com",
+            password="cache-pass-123",
+            username="cache",
+            first_name="Cached",
+            last_name="User",
+            phone="255700000001",
+            is_active=True,
+        )
+
+    def setUp(self):
+        USER_CACHE.clear()
+        self.factory = RequestFactory()
+        self.token = str(AccessToken.for_user(self.user))
+
+    def authenticate(self, method="get", view=None, token=None):
+        request = getattr(self.factory, method)(
+            "/api/", HTTP_AUTHORIZATION=f"Bearer {token or self.token}"
+        )
+        if view is not None:
+            request = Request(request, parser_context={"view": view})
+        return CustomJWTAuthentication().authenticate(request)
+
+    def test_user_is_cached(self):
+        with self.assertNumQueries(1):
+            user, _ = self.authenticate()
+        with self.assertNumQueries(0):
+            cached, _ = self.authenticate()
+        self.assertEqual(cached.pk, self.user.pk)
+        self.assertEqual(cached.email, self.user.email)
+
+    def test_deactivation_evicts_cached_user(self):
+        self.authenticate()
+        self.user.is_active = False
+        self.user.save()
+        self.assertIsNone(self.authenticate())
+
+    def test_stateless_methods_trust_claims(self):
+        with self.assertNumQueries(0):
+            user, _ = self.authenticate("post", view=SearchRouteView())
+        self.assertIsInstance(user, TokenUser)
+        self.assertEqual(user.id, str(self.user.pk))
+
+    def test_invalid_token_is_anonymous(self):
+        self.assertIsNone(self.authenticate(token="not-a-token"))
+
+    def test_malformed_header_is_anonymous(self):
+        for header in ("Bearer", "Bearer two parts"):
+            with self.subTest(header=header):
+                request = self.factory.get("/api/", HTTP_AUTHORIZATION=header)
+                self.assertIsNone(CustomJWTAuthentication().authenticate(request))
+
+        response = self.client.get("/api/route/", HTTP_AUTHORIZATION="Bearer")
+        self.assertEqual(response.status_code, 200)
+        # the profiling middleware checks for staff with the same header
+        response = self.client.get("/api/route/", HTTP_AUTHORIZATION="Bearer", HTTP_X_PROFILE="1")
+        self.assertEqual(response.status_code, 200)
+
+
+class TokenBlacklistTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email="refresh@example.com",
+            password="refresh-pass-123",
+            username="refresh",
+            first_name="Refresh",
+            last_name="Token",
+            phone="255700000002",
+            is_active=True,
+        )
+
+    def setUp(self):
+        BLACKLIST_FILTER.reset()
+        self.client = APIClient()
+
+    def refresh(self, token):
+        return self.client.post("/api/auth/jwt/refresh/", {"refresh": token}, format="json")
+
+    def test_rotated_token_is_rejected(self):
+        token = str(RefreshToken.for_user(self.user))
+        response = self.refresh(token)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.refresh(token).status_code, 401)
+        self.assertEqual(self.refresh(response.data["refresh"]).status_code, 200)
+
+    def test_filter_sees_tokens_blacklisted_elsewhere(self):
+        token = RefreshToken.for_user(self.user)
+        # builds the filter before the token is blacklisted
+        self.assertEqual(self.refresh(str(RefreshToken.for_user(self.user))).status_code, 200)
+        outstanding = OutstandingToken.objects.get(jti=token["jti"])
+        BlacklistedToken.objects.create(token=outstanding)
+
+        with self.settings(TOKEN_BLACKLIST_SYNC_INTERVAL=1e-9):
+            self.assertEqual(self.refresh(str(token)).status_code, 401)
+
+    def test_rebuild_does_not_hold_the_lock(self):
+        blacklisted = RefreshToken.for_user(self.user)
+        blacklisted.blacklist()
+        BLACKLIST_FILTER.reset()
+        build = BLACKLIST_FILTER._build
+        checks = []
+
+        def slow_build():
+            # another thread checks and blacklists a token while the filter is built
+            def other_request():
+                checks.append(BLACKLIST_FILTER.might_contain("unknown-jti"))
+                BLACKLIST_FILTER.add("rotated-jti")
+
+            thread = threading.Thread(target=other_request)
+            thread.start()
+            thread.join(timeout=5)
+            self.assertFalse(thread.is_alive())
+            return build()
+
+        with mock.patch.object(BLACKLIST_FILTER, "_build", slow_build):
+            self.assertTrue(BLACKLIST_FILTER.might_contain(blacklisted["jti"]))
+        # no filter yet: the other thread had to ask the database
+        self.assertEqual(checks, [True])
+        self.assertTrue(BLACKLIST_FILTER.might_contain("rotated-jti"))
+        self.assertFalse(BLACKLIST_FILTER.might_contain("unknown-jti"))
+
+    def test_purge_expired_tokens(self):
+        live = RefreshToken.for_user(self.user)
+        expired = RefreshToken.for_user(self.user)
+        expired.blacklist()
+        OutstandingToken.objects.filter(jti=expired["jti"]).update(
+            expires_at=aware_utcnow() - timedelta(minutes=1)
+        )
+
+        self.assertEqual(purge_expired_tokens(batch_size=1), 1)
+        self.assertEqual(
+            list(OutstandingToken.objects.values_list("jti", flat=True)), [live["jti"]]
+        )
+        self.assertFalse(BlacklistedToken.objects.exists())
+
+
+class BloomFilterTests(SimpleTestCase):
+    def test_sizing(self):
+        bloom = BloomFilter(10_000, false_positive_rate=0.01)
+        # m = -n ln p / ln(2)^2 bits, k = m / n ln 2 hashes
+        self.assertEqual(bloom.size, 95_851)
+        self.assertEqual(bloom.hashes, 7)
+        self.assertEqual(len(bloom.bits), 11_982)
+
+    def test_false_positive_rate(self):
+        bloom = BloomFilter(10_000, false_positive_rate=0.01)
+        members = [f"member-{index}" for index in range(10_000)]
+        for key in members:
+            bloom.add(key)
+
+        self.assertEqual(bloom.count, 10_000)
+        self.assertTrue(all(key in bloom for key in members))
+        false_positives = sum(f"other-{index}" in bloom for index in range(20_000))
+        # about 1% at full capacity
+        self.assertLess(false_positives / 20_000, 0.015)
+        self.assertGreater(false_positives, 0)
+
+
+class FailingEmailBackend(BaseEmailBackend):
+    def send_messages(self, email_messages):
+        raise SMTPServerDisconnected("Connection unexpectedly closed")
+
+
+class EmailOutboxTests(TestCase):
+    def register(self):
+        return APIClient().post(
+            "/api/auth/users/",
+            {
+                "email": "outbox@example.com",
+                "password": "outbox-pass-123",
+                "username": "outbox",
+                "first_name": "Out",
+                "last_name": "Box",
+                "phone": "255700000003",
+            },
+            format="json",
+        )
+
+    def test_registration_queues_activation_email(self):
+        self.assertEqual(self.register().status_code, 201)
+        self.assertEqual(mail.outbox, [])
+
+        self.assertEqual(send_due_emails(), (1, 0))
+        [message] = mail.outbox
+        self.assertEqual(message.to, ["outbox@example.com"])
+        self.assertIn("auth/activation/", message.alternatives[0][0])
+        self.assertEqual(EmailOutbox.objects.get().status, "SENT")
+        self.assertEqual(send_due_emails(), (0, 0))
+
+    @override_settings(EMAIL_BACKEND="accounts.tests.FailingEmailBackend")
+    def test_failed_email_is_retried_later(self):
+        self.register()
+        self.assertEqual(send_due_emails(), (0, 1))
+
+        entry = EmailOutbox.objects.get()
+        self.assertEqual((entry.status, entry.attempts), ("PENDING", 1))
+        self.assertIn("SMTPServerDisconnected", entry.last_error)
+        self.assertEqual(send_due_emails(), (0, 0))
+        self.assertEqual(send_due_emails(now=entry.next_attempt_at), (0, 1))
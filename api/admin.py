@@ -2,6 +2,7 @@ from django.contrib import admin
 from django.contrib import admin
 from django.utils import timezone
 from datetime import timedelta
+from .services import cancel_booking, mark_booking_paid, save_booking
 from .models import (
     BusCompany,
     Route,
@@ -13,6 +14,7 @@ from .models import (
     PromoCode,
     Passenger,
     BusAssignment,
+    ScheduleArchive,
 )
 
 
@@ -56,17 +58,69 @@ class ScheduleTemplateAdmin(admin.ModelAdmin):
         self.message_user(request, f"{created} schedules created for the next 30 days")
 
 
+@admin.register(Bus)
+class BusAdmin(admin.ModelAdmin):
+    list_display = ["plate_number", "company", "bus_type", "total_seats", "is_active"]
+    list_select_related = ["company"]
+
+
+@admin.register(Schedule)
+class ScheduleAdmin(admin.ModelAdmin):
+    list_display = ["__str__", "departure_time", "price", "status", "booked_seats"]
+    list_select_related = ["template__route"]
+
+
+@admin.register(BusAssignment)
+class BusAssignmentAdmin(admin.ModelAdmin):
+    list_display = ["__str__", "available_seats", "booked_seats", "status"]
+    list_select_related = ["schedule__template__route", "bus"]
+
+
+@admin.register(Booking)
+class BookingAdmin(admin.ModelAdmin):
+    list_display = ["__str__", "seat_number", "price_paid", "is_paid", "booked_at"]
+    list_select_related = ["user", "schedule__template__route", "passenger"]
+    actions = ["mark_paid"]
+
+    # the seat counters on bus assignments and schedules follow every change
+    def save_model(self, request, obj, form, change):
+        save_booking(obj)
+
+    def delete_model(self, request, obj):
+        cancel_booking(obj)
+
+    def delete_queryset(self, request, queryset):
+        for booking in queryset:
+            cancel_booking(booking)
+
+    @admin.action(description="Mark selected bookings as paid")
+    def mark_paid(self, request, queryset):
+        for booking in queryset.filter(is_paid=False):
+            mark_booking_paid(booking)
+
+
+@admin.register(ScheduleArchive)
+class ScheduleArchiveAdmin(admin.ModelAdmin):
+    list_display = [
+        "route_origin",
+        "route_destination",
+        "travel_date",
+        "departure_time",
+        "status",
+        "total_bookings",
+        "archived_at",
+    ]
+    list_filter = ["status", "travel_date"]
+    search_fields = ["route_origin", "route_destination"]
+
+
 admin.site.register(
     [
         BusCompany,
         Route,
         RouteStop,
-        Bus,
-        Schedule,
         ScheduleTemplate,
-        Booking,
         PromoCode,
         Passenger,
-        BusAssignment,
     ]
 )
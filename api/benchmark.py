@@ -0,0 +1,265 @@
+"""
+HTTP load generator for the search, booking and catalog endpoints.
+
+Each scenario runs on its own for a fixed duration (or number of requests) with
+`concurrency` threads, every thread keeping its own keep-alive session. Results are
+summarized as throughput, latency percentiles and error rates, and can be saved as a
+baseline (JSON under benchmarks/baselines/) to compare later runs against.
+"""
+
+import json
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from pathlib import Path
+
+import requests
+from django.conf import settings
+
+BASELINE_DIR = Path(settings.BASE_DIR) / "benchmarks" / "baselines"
+
+# public catalog endpoints, the bus ones need a token
+CATALOG_PATHS = ["/api/route/", "/api/route-stop/", "/api/schedule-template/"]
+AUTHENTICATED_CATALOG_PATHS = ["/api/bus-companies/", "/api/bus/"]
+
+SCENARIOS = ["search", "booking", "catalog"]
+
+
+@dataclass
+class Sample:
+    latency: float
+    status: int  # 0 when the request failed before a response
+
+
+@dataclass
+class Targets:
+    """What the scenarios pick from, discovered from the API before the timed run"""
+
+    routes: list = field(default_factory=list)  # (origin, destination)
+    dates: list = field(default_factory=list)
+    # (schedule id, bus assignment id, total seats, boarding point, dropping point)
+    bookable: list = field(default_factory=list)
+    catalog_paths: list = field(default_factory=list)
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+def summarize(samples, elapsed):
+    latencies = sorted(sample.latency * 1000 for sample in samples)
+    total = len(samples)
+    errors = sum(1 for sample in samples if sample.status == 0 or sample.status >= 500)
+    # 4xx are expected outcomes under load, e.g. a seat taken by another thread
+    rejected = sum(1 for sample in samples if 400 <= sample.status < 500)
+    return {
+        "requests": total,
+        "throughput_rps": round(total / elapsed, 1) if elapsed else 0.0,
+        "mean_ms": round(sum(latencies) / total, 2) if total else 0.0,
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+        "error_rate": round(errors / total, 4) if total else 0.0,
+        "rejected_rate": round(rejected / total, 4) if total else 0.0,
+    }
+
+
+class LoadRunner:
+    def __init__(
+        self,
+        base_url,
+        concurrency=10,
+        duration=10.0,
+        requests_per_scenario=None,
+        token=None,
+        days=7,
+        seed=1,
+        timeout=30.0,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.concurrency = concurrency
+        self.duration = duration
+        self.requests_per_scenario = requests_per_scenario
+        self.token = token
+        self.days = days
+        self.seed = seed
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def session(self):
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = self._local.session = requests.Session()
+            if self.token:
+                session.headers["Authorization"] = f"Bearer {self.token}"
+        return session
+
+    def request(self, method, path, **kwargs):
+        start = time.perf_counter()
+        try:
+            response = self.session().request(
+                method, self.base_url + path, timeout=self.timeout, **kwargs
+            )
+            status = response.status_code
+        except requests.RequestException:
+            response, status = None, 0
+        return Sample(time.perf_counter() - start, status), response
+
+    def discover(self):
+        """Collect routes, travel dates and bookable bus assignments from the API"""
+        targets = Targets()
+        today = date.today()
+        targets.dates = [today + timedelta(days=day) for day in range(self.days)]
+
+        _, response = self.request("GET", "/api/route/")
+        if response is None or response.status_code != 200:
+            raise RuntimeError(f"Cannot list routes from {self.base_url}")
+        targets.routes = [(route["origin"], route["destination"]) for route in response.json()]
+
+        # a sample of searches provides schedule and bus assignment ids to book
+        rng = random.Random(self.seed)
+        for origin, destination in rng.sample(targets.routes, min(20, len(targets.routes))):
+            _, response = self.request(
+                "POST",
+                "/api/search/",
+                json=self.search_payload(origin, destination, rng, targets.dates),
+            )
+            if response is None or response.status_code != 200:
+                continue
+            for schedule in response.json()["results"]:
+                for bus in schedule["buses"]:
+                    targets.bookable.append(
+                        (schedule["id"], bus["id"], bus["total_seats"], origin, destination)
+                    )
+
+        targets.catalog_paths = list(CATALOG_PATHS)
+        if self.token:
+            targets.catalog_paths += AUTHENTICATED_CATALOG_PATHS
+        return targets
+
+    def search_payload(self, origin, destination, rng, dates):
+        travel_date = rng.choice(dates)
+        return {
+            "origin": origin,
+            "destination": destination,
+            "date": travel_date.strftime("%d-%m-%Y"),
+        }
+
+    def make_request(self, scenario, targets, rng):
+        if scenario == "search":
+            origin, destination = rng.choice(targets.routes)
+            return self.request(
+                "POST",
+                "/api/search/",
+                json=self.search_payload(origin, destination, rng, targets.dates),
+            )[0]
+
+        if scenario == "booking":
+            schedule_id, assignment_id, seats, boarding, dropping = rng.choice(targets.bookable)
+            return self.request(
+                "POST",
+                "/api/bookings/",
+                json={
+                    "schedule_id": schedule_id,
+                    "bus_assignment_id": assignment_id,
+                    "seat_number": rng.randint(1, seats),
+                    "passenger": {
+                        "first_name": "Load",
+                        "last_name": "Test",
+                        "email": "load.test@example.com",
+                        "phone": "255700000000",
+                        "age": rng.randint(18, 80),
+                        "gender": rng.choice("MF"),
+                        "nationality": "Tanzanian",
+                        "boarding_point": boarding,
+                        "dropping_point": dropping,
+                    },
+                },
+            )[0]
+
+        return self.request("GET", rng.choice(targets.catalog_paths))[0]
+
+    def run_scenario(self, scenario, targets):
+        if scenario == "booking" and not targets.bookable:
+            raise RuntimeError("No bookable schedules found, seed the database first")
+
+        samples = []
+        lock = threading.Lock()
+        deadline = time.perf_counter() + self.duration
+        remaining = [self.requests_per_scenario]
+
+        def take_ticket():
+            if remaining[0] is None:
+                return time.perf_counter() < deadline
+            with lock:
+                if remaining[0] <= 0:
+                    return False
+                remaining[0] -= 1
+                return True
+
+        def worker(index):
+            rng = random.Random(f"{self.seed}-{scenario}-{index}")
+            local = []
+            while take_ticket():
+                local.append(self.make_request(scenario, targets, rng))
+            with lock:
+                samples.extend(local)
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(self.concurrency) as pool:
+            list(pool.map(worker, range(self.concurrency)))
+        return summarize(samples, time.perf_counter() - start)
+
+    def run(self, scenarios=SCENARIOS):
+        targets = self.discover()
+        if not targets.routes:
+            raise RuntimeError("No routes found, seed the database first")
+        return {scenario: self.run_scenario(scenario, targets) for scenario in scenarios}
+
+
+def baseline_path(name):
+    return BASELINE_DIR / f"{name}.json"
+
+
+def save_baseline(name, results, config):
+    path = baseline_path(name)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps({"config": config, "results": results}, indent=2) + "\n")
+    return path
+
+
+def load_baseline(name):
+    return json.loads(baseline_path(name).read_text())
+
+
+def compare(results, baseline, tolerance=0.1):
+    """
+    Per scenario changes of throughput and p95 against a baseline. A scenario regressed
+    when throughput dropped or p95 grew by more than `tolerance`, or errors appeared.
+    """
+    comparison = {}
+    for scenario, current in results.items():
+        previous = baseline["results"].get(scenario)
+        if previous is None:
+            continue
+        throughput = _change(current["throughput_rps"], previous["throughput_rps"])
+        p95 = _change(current["p95_ms"], previous["p95_ms"])
+        comparison[scenario] = {
+            "throughput_change": throughput,
+            "p95_change": p95,
+            "regressed": throughput < -tolerance
+            or p95 > tolerance
+            or current["error_rate"] > previous["error_rate"],
+        }
+    return comparison
+
+
+def _change(current, previous):
+    return round((current - previous) / previous, 4) if previous else 0.0
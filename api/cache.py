@@ -0,0 +1,87 @@
+import hashlib
+import threading
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.response import Response
+
+from .metrics import CATALOG_CACHE_REQUESTS
+
+# per-process hit/miss counters, keyed by (namespace, "hit" | "miss")
+_stats = Counter()
+_stats_lock = threading.Lock()
+
+
+def cache_stats():
+    """Snapshot of catalog cache hits/misses per namespace in this process"""
+    with _stats_lock:
+        stats = {}
+        for (namespace, outcome), count in _stats.items():
+            stats.setdefault(namespace, {"hit": 0, "miss": 0})[outcome] = count
+        return stats
+
+
+def _record(namespace, outcome):
+    with _stats_lock:
+        _stats[(namespace, outcome)] += 1
+    CATALOG_CACHE_REQUESTS.inc(namespace=namespace, outcome=outcome)
+
+
+def _version_key(namespace):
+    return f"catalog:{namespace}:version"
+
+
+def get_version(namespace):
+    return cache.get_or_set(_version_key(namespace), 1, timeout=None)
+
+
+def invalidate(namespace):
+    """Bump the namespace version so every cached list/detail for it is ignored"""
+    try:
+        cache.incr(_version_key(namespace))
+    except ValueError:
+        cache.set(_version_key(namespace), 2, timeout=None)
+
+
+def namespace_for(model):
+    return model._meta.label_lower
+
+
+class CachedCatalogMixin:
+    """
+    Caches the serialized data of list/retrieve for ModelViewSets over rarely changing
+    models. Entries are versioned per model and invalidated on every save/delete of
+    that model (see api/signals.py), so writes are visible immediately.
+    """
+
+    def get_cache_namespace(self):
+        return namespace_for(self.queryset.model)
+
+    def get_cache_key(self, request, action):
+        namespace = self.get_cache_namespace()
+        path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+        return f"catalog:{namespace}:v{get_version(namespace)}:{action}:{path}"
+
+    def cached_response(self, request, action, handler, *args, **kwargs):
+        namespace = self.get_cache_namespace()
+        key = self.get_cache_key(request, action)
+
+        data = cache.get(key)
+        if data is not None:
+            _record(namespace, "hit")
+            return Response(data)
+
+        _record(namespace, "miss")
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            cache.set(key, response.data, settings.CATALOG_CACHE_TIMEOUT)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(request, "list", super().list, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(
+            request, "retrieve", super().retrieve, *args, **kwargs
+        )
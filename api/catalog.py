@@ -0,0 +1,194 @@
+"""
+Immutable in-process snapshot of the route network.
+
+Routes, their ordered stops and schedule templates change rarely, so search and booking
+read them from a snapshot instead of the database. The snapshot is tagged with
+CatalogVersion.version; the version row is checked at most every
+CATALOG_CHECK_INTERVAL seconds and a new snapshot is built and swapped in when it changed.
+"""
+
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from datetime import time as dt_time
+from decimal import Decimal
+from types import MappingProxyType
+from typing import Mapping, Optional
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import F
+
+from .metrics import CATALOG_SNAPSHOT_LOADS
+from .models import CatalogVersion, Route, RouteStop, ScheduleTemplate
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True, slots=True)
+class StopEntry:
+    name: str
+    order: int
+    arrival_offset_min: int
+    departure_offset_min: int
+
+
+@dataclass(frozen=True, slots=True)
+class TemplateEntry:
+    id: int
+    route_id: int
+    departure_time: dt_time
+    arrival_time: dt_time
+    base_price: Decimal
+    is_active: bool
+
+
+@dataclass(frozen=True, slots=True)
+class RouteEntry:
+    id: int
+    origin: str
+    destination: str
+    distance_km: Optional[int]
+    estimated_duration_minutes: Optional[int]
+    stops: tuple
+    template_ids: tuple
+
+    def __str__(self):
+        return f"{self.origin} → {self.destination}"
+
+
+@dataclass(frozen=True, slots=True)
+class Catalog:
+    version: int
+    routes: Mapping[int, RouteEntry]
+    templates: Mapping[int, TemplateEntry]
+
+    def match_routes(self, origin, destination):
+        """Routes whose origin/destination contain the given text (case-insensitive)"""
+        origin, destination = origin.lower(), destination.lower()
+        return [
+            route
+            for route in self.routes.values()
+            if origin in route.origin.lower()
+            and destination in route.destination.lower()
+        ]
+
+    def active_template_ids(self, origin, destination):
+        return [
+            template_id
+            for route in self.match_routes(origin, destination)
+            for template_id in route.template_ids
+            if self.templates[template_id].is_active
+        ]
+
+    def route_for_template(self, template_id):
+        template = self.templates.get(template_id)
+        return self.routes.get(template.route_id) if template else None
+
+
+_catalog: Optional[Catalog] = None
+_checked_at = 0.0
+_reload_lock = threading.Lock()
+
+
+def current_version():
+    row = CatalogVersion.objects.filter(pk=1).values_list("version", flat=True).first()
+    return row or 0
+
+
+def bump_version():
+    if not CatalogVersion.objects.filter(pk=1).update(version=F("version") + 1):
+        CatalogVersion.objects.get_or_create(pk=1)
+
+
+def load_catalog(version=None):
+    version = current_version() if version is None else version
+    CATALOG_SNAPSHOT_LOADS.inc()
+
+    stops = {}
+    for stop in RouteStop.objects.order_by("route_id", "stop_order"):
+        stops.setdefault(stop.route_id, []).append(
+            StopEntry(
+                name=stop.stop_name,
+                order=stop.stop_order,
+                arrival_offset_min=stop.arrival_offset_min,
+                departure_offset_min=stop.departure_offset_min,
+            )
+        )
+
+    templates = {}
+    route_templates = {}
+    for template in ScheduleTemplate.objects.order_by("departure_time", "id"):
+        templates[template.pk] = TemplateEntry(
+            id=template.pk,
+            route_id=template.route_id,
+            departure_time=template.departure_time,
+            arrival_time=template.arrival_time,
+            base_price=template.base_price,
+            is_active=template.is_active,
+        )
+        route_templates.setdefault(template.route_id, []).append(template.pk)
+
+    routes = {
+        route.pk: RouteEntry(
+            id=route.pk,
+            origin=route.origin,
+            destination=route.destination,
+            distance_km=route.distance_km,
+            estimated_duration_minutes=route.estimated_duration_minutes,
+            stops=tuple(stops.get(route.pk, ())),
+            template_ids=tuple(route_templates.get(route.pk, ())),
+        )
+        for route in Route.objects.order_by("id")
+    }
+
+    return Catalog(
+        version=version,
+        routes=MappingProxyType(routes),
+        templates=MappingProxyType(templates),
+    )
+
+
+def get_catalog():
+    """Current snapshot, reloaded when the catalog version changed since the last check"""
+    global _catalog, _checked_at
+
+    now = time.monotonic()
+    if _catalog is not None and now - _checked_at < settings.CATALOG_CHECK_INTERVAL:
+        return _catalog
+
+    with _reload_lock:
+        if _catalog is None or now - _checked_at >= settings.CATALOG_CHECK_INTERVAL:
+            version = current_version()
+            if _catalog is None or _catalog.version != version:
+                _catalog = load_catalog(version)
+            _checked_at = time.monotonic()
+    return _catalog
+
+
+def warm_catalog():
+    """Load the snapshot up front, e.g. when a worker starts"""
+    global _catalog, _checked_at
+    with _reload_lock:
+        _catalog = load_catalog()
+        _checked_at = time.monotonic()
+    return _catalog
+
+
+def warm_catalog_on_startup():
+    """Called when the WSGI/ASGI application is created, never fails the startup"""
+    try:
+        warm_catalog()
+    except Exception:
+        # e.g. database unreachable or not migrated yet, the snapshot is loaded on first use
+        logger.warning("Loading the route catalog at startup failed", exc_info=True)
+    finally:
+        # don't hand an open connection to forked workers
+        connections.close_all()
+
+
+def reset_catalog():
+    """Drop the snapshot so the next get_catalog() reloads it"""
+    global _catalog
+    _catalog = None
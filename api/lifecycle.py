@@ -0,0 +1,172 @@
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import F, Q, Prefetch
+from django.utils import timezone
+
+from .models import Booking, BusAssignment, Schedule, ScheduleArchive
+
+
+def _finished_schedules_filter(now):
+    """Schedules whose arrival is already in the past (handles overnight trips)"""
+    local_now = timezone.localtime(now)
+    today = local_now.date()
+    yesterday = today - timedelta(days=1)
+    current_time = local_now.time()
+
+    same_day_arrival = Q(arrival_time__gte=F("departure_time"))
+
+    return (
+        Q(travel_date__lt=yesterday)
+        # overnight trips from yesterday arrive today
+        | (
+            Q(travel_date=yesterday)
+            & (same_day_arrival | Q(arrival_time__lte=current_time))
+        )
+        | (Q(travel_date=today) & same_day_arrival & Q(arrival_time__lte=current_time))
+    )
+
+
+def complete_past_schedules(now=None, batch_size=500):
+    """
+    Move ACTIVE schedules (and their bus assignments) that already arrived to COMPLETED.
+    Works in batches so a large backlog doesn't hold one long write transaction.
+    """
+    now = now or timezone.now()
+    finished = Schedule.objects.filter(
+        _finished_schedules_filter(now), status="ACTIVE"
+    ).order_by("id")
+
+    completed = 0
+    while True:
+        with transaction.atomic():
+            ids = list(finished.values_list("id", flat=True)[:batch_size])
+            if not ids:
+                break
+            Schedule.objects.filter(id__in=ids).update(status="COMPLETED")
+            BusAssignment.objects.filter(schedule_id__in=ids, status="ACTIVE").update(
+                status="COMPLETED"
+            )
+        completed += len(ids)
+
+    return completed
+
+
+def _archive_row(schedule):
+    route = schedule.template.route
+    assignments = []
+    total_bookings = 0
+
+    for assignment in schedule.bus_assignments.all():
+        bookings = []
+        for booking in assignment.bookings.all():
+            passenger = getattr(booking, "passenger", None)
+            bookings.append(
+                {
+                    "id": booking.pk,
+                    "user_id": booking.user_id,
+                    "seat_number": booking.seat_number,
+                    "price_paid": str(booking.price_paid),
+                    "is_paid": booking.is_paid,
+                    "booked_at": booking.booked_at.isoformat(),
+                    "passenger": (
+                        {
+                            "first_name": passenger.first_name,
+                            "last_name": passenger.last_name,
+                            "email": passenger.email,
+                            "phone": passenger.phone,
+                            "age": passenger.age,
+                            "gender": passenger.gender,
+                            "nationality": passenger.nationality,
+                            "boarding_point": passenger.boarding_point,
+                            "dropping_point": passenger.dropping_point,
+                        }
+                        if passenger
+                        else None
+                    ),
+                }
+            )
+        total_bookings += len(bookings)
+        assignments.append(
+            {
+                "id": assignment.pk,
+                "bus_id": assignment.bus_id,
+                "plate_number": assignment.bus.plate_number,
+                "status": assignment.status,
+                "bookings": bookings,
+            }
+        )
+
+    return ScheduleArchive(
+        schedule_id=schedule.pk,
+        template_id=schedule.template_id,
+        route_origin=route.origin,
+        route_destination=route.destination,
+        travel_date=schedule.travel_date,
+        departure_time=schedule.departure_time,
+        arrival_time=schedule.arrival_time,
+        price=schedule.price,
+        status=schedule.status,
+        total_bookings=total_bookings,
+        bus_assignments=assignments,
+    )
+
+
+ARCHIVE_UPDATE_FIELDS = [
+    "template_id",
+    "route_origin",
+    "route_destination",
+    "travel_date",
+    "departure_time",
+    "arrival_time",
+    "price",
+    "status",
+    "total_bookings",
+    "bus_assignments",
+    "archived_at",
+]
+
+
+def archive_finished_schedules(older_than_days=30, batch_size=200, today=None):
+    """
+    Copy COMPLETED/CANCELLED schedules older than `older_than_days` into ScheduleArchive
+    and delete them (with their assignments, bookings and passengers) from the live tables.
+    """
+    today = today or timezone.localdate()
+    cutoff = today - timedelta(days=older_than_days)
+
+    finished = Schedule.objects.filter(
+        status__in=["COMPLETED", "CANCELLED"], travel_date__lt=cutoff
+    ).order_by("id")
+
+    archived = 0
+    while True:
+        with transaction.atomic():
+            schedules = list(
+                finished.select_related("template__route").prefetch_related(
+                    Prefetch(
+                        "bus_assignments",
+                        queryset=BusAssignment.objects.select_related("bus"),
+                    ),
+                    Prefetch(
+                        "bus_assignments__bookings",
+                        queryset=Booking.objects.select_related("passenger"),
+                    ),
+                )[:batch_size]
+            )
+            if not schedules:
+                break
+
+            # a schedule archived before (e.g. restored and finished again) keeps one
+            # row holding its latest state
+            ScheduleArchive.objects.bulk_create(
+                [_archive_row(schedule) for schedule in schedules],
+                update_conflicts=True,
+                unique_fields=["schedule_id"],
+                update_fields=ARCHIVE_UPDATE_FIELDS,
+            )
+            # cascades to bus assignments, bookings and passengers
+            Schedule.objects.filter(id__in=[s.pk for s in schedules]).delete()
+        archived += len(schedules)
+
+    return archived
@@ -0,0 +1,145 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.benchmark import (
+    SCENARIOS,
+    LoadRunner,
+    baseline_path,
+    compare,
+    load_baseline,
+    save_baseline,
+)
+from api.seeding import seed_dataset
+
+
+class Command(BaseCommand):
+    help = "Load test search, booking and catalog endpoints of a running server"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--url",
+            default="http://127.0.0.1:8000",
+            help="Base URL of the server under test",
+        )
+        parser.add_argument(
+            "--scenarios",
+            default=",".join(SCENARIOS),
+            help=f"Comma separated scenarios to run ({', '.join(SCENARIOS)})",
+        )
+        parser.add_argument("--concurrency", type=int, default=10)
+        parser.add_argument(
+            "--duration",
+            type=float,
+            default=10.0,
+            help="Seconds each scenario runs",
+        )
+        parser.add_argument(
+            "--requests",
+            type=int,
+            help="Requests per scenario, overrides --duration",
+        )
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=7,
+            help="Travel dates searched and booked, starting today",
+        )
+        parser.add_argument("--token", help="JWT access token for authenticated endpoints")
+        parser.add_argument(
+            "--seed",
+            type=int,
+            default=1,
+            help="Random seed for the dataset and the request mix",
+        )
+        parser.add_argument(
+            "--seed-data",
+            action="store_true",
+            help="Seed the benchmark dataset into this project's database first "
+            "(the server must use the same database)",
+        )
+        parser.add_argument(
+            "--save-baseline",
+            metavar="NAME",
+            help="Save the results as benchmarks/baselines/NAME.json",
+        )
+        parser.add_argument(
+            "--compare",
+            metavar="NAME",
+            help="Compare the results against a saved baseline",
+        )
+        parser.add_argument(
+            "--tolerance",
+            type=float,
+            default=0.1,
+            help="Allowed relative throughput drop / p95 increase when comparing",
+        )
+
+    def handle(self, *args, **options):
+        scenarios = [name.strip() for name in options["scenarios"].split(",") if name.strip()]
+        unknown = set(scenarios) - set(SCENARIOS)
+        if unknown:
+            raise CommandError(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+
+        if options["seed_data"]:
+            created = seed_dataset(days=options["days"], seed=options["seed"])
+            if created is None:
+                self.stdout.write(f"Dataset for seed {options['seed']} already exists")
+            else:
+                self.stdout.write(
+                    "Seeded " + ", ".join(f"{count} {name}" for name, count in created.items())
+                )
+
+        runner = LoadRunner(
+            options["url"],
+            concurrency=options["concurrency"],
+            duration=options["duration"],
+            requests_per_scenario=options["requests"],
+            token=options["token"],
+            days=options["days"],
+            seed=options["seed"],
+        )
+        try:
+            results = runner.run(scenarios)
+        except RuntimeError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(
+            f"{'scenario':<10} {'requests':>9} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} "
+            f"{'p99 ms':>8} {'errors':>7} {'4xx':>7}"
+        )
+        for scenario, summary in results.items():
+            self.stdout.write(
+                f"{scenario:<10} {summary['requests']:>9} {summary['throughput_rps']:>8} "
+                f"{summary['p50_ms']:>8} {summary['p95_ms']:>8} {summary['p99_ms']:>8} "
+                f"{summary['error_rate']:>7.2%} {summary['rejected_rate']:>7.2%}"
+            )
+
+        if options["save_baseline"]:
+            config = {
+                key: options[key]
+                for key in ("url", "concurrency", "duration", "requests", "days", "seed")
+            }
+            path = save_baseline(options["save_baseline"], results, config)
+            self.stdout.write(self.style.SUCCESS(f"Saved baseline to {path}"))
+
+        if options["compare"]:
+            try:
+                baseline = load_baseline(options["compare"])
+            except FileNotFoundError:
+                raise CommandError(f"No baseline at {baseline_path(options['compare'])}")
+
+            comparison = compare(results, baseline, tolerance=options["tolerance"])
+            for scenario, change in comparison.items():
+                line = (
+                    f"{scenario}: throughput {change['throughput_change']:+.1%}, "
+                    f"p95 {change['p95_change']:+.1%}"
+                )
+                style = self.style.ERROR if change["regressed"] else self.style.SUCCESS
+                self.stdout.write(style(line))
+
+            if any(change["regressed"] for change in comparison.values()):
+                raise CommandError(
+                    "Regression against baseline "
+                    + json.dumps(baseline["config"], sort_keys=True)
+                )
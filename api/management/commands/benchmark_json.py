@@ -0,0 +1,116 @@
+import datetime
+import io
+import random
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from core.fastjson import FastJSONParser, FastJSONRenderer, orjson
+
+AMENITIES = ["wifi", "ac", "usb", "toilet", "tv", "blanket"]
+BUS_TYPES = ["STANDARD", "LUXURY", "SLEEPER"]
+
+
+def search_payload(schedules, buses, raw, seed=0):
+    """
+    A search response shaped like ScheduleSearchSerializer output. With `raw` prices,
+    dates and times are Decimal/date/time objects instead of the strings the
+    serializer produces, exercising the encoder fallback.
+    """
+    rng = random.Random(seed)
+    travel_date = datetime.date(2030, 1, 1)
+    results = []
+    for index in range(schedules):
+        departure = datetime.time(rng.randrange(24), rng.randrange(0, 60, 5))
+        arrival = datetime.time(rng.randrange(24), rng.randrange(0, 60, 5))
+        price = Decimal(rng.randrange(500, 20000)) / 100
+        results.append(
+            {
+                "id": index + 1,
+                "route": "Addis Ababa - Bahir Dar",
+                "route_origin": "Addis Ababa",
+                "route_destination": "Bahir Dar",
+                "travel_date": travel_date if raw else travel_date.isoformat(),
+                "departure_time": departure if raw else departure.isoformat(),
+                "arrival_time": arrival if raw else arrival.isoformat(),
+                "price": price if raw else str(price),
+                "buses": [
+                    {
+                        "id": index * buses + bus + 1,
+                        "bus_plate": f"AA-{rng.randrange(10000, 99999)}",
+                        "bus_type": rng.choice(BUS_TYPES),
+                        "company_name": f"Company {rng.randrange(50)}",
+                        "total_seats": 50,
+                        "amenities": rng.sample(AMENITIES, rng.randrange(len(AMENITIES))),
+                        "available_seats": rng.randrange(51),
+                        "status": "ACTIVE",
+                    }
+                    for bus in range(buses)
+                ],
+            }
+        )
+    return {"success": True, "results": results}
+
+
+def best_of(function, iterations, repeat=5):
+    """Fastest mean seconds per call over `repeat` rounds of `iterations` calls"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            function()
+        timings.append((time.perf_counter() - start) / iterations)
+    return min(timings)
+
+
+class Command(BaseCommand):
+    help = "Compare DRF's JSON renderer/parser with core.fastjson on large search responses"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--schedules", type=int, default=500)
+        parser.add_argument("--buses", type=int, default=3, help="Buses per schedule")
+        parser.add_argument("--iterations", type=int, default=20)
+
+    def handle(self, *args, **options):
+        if orjson is None:
+            self.stdout.write(
+                self.style.WARNING("orjson is not installed, FastJSON* use the json module")
+            )
+
+        for raw in (False, True):
+            payload = search_payload(options["schedules"], options["buses"], raw)
+            default_body = JSONRenderer().render(payload)
+            fast_body = FastJSONRenderer().render(payload)
+            kind = "raw Decimal/date/time values" if raw else "serializer output (strings)"
+            self.stdout.write(
+                f"{kind}: {options['schedules']} schedules, {len(default_body) / 1024:.0f} KiB, "
+                f"identical output: {'yes' if fast_body == default_body else 'NO'}"
+            )
+            self.report(
+                "render",
+                len(default_body),
+                best_of(lambda: JSONRenderer().render(payload), options["iterations"]),
+                best_of(lambda: FastJSONRenderer().render(payload), options["iterations"]),
+            )
+            self.report(
+                "parse",
+                len(default_body),
+                best_of(
+                    lambda: JSONParser().parse(io.BytesIO(default_body)), options["iterations"]
+                ),
+                best_of(
+                    lambda: FastJSONParser().parse(io.BytesIO(default_body)),
+                    options["iterations"],
+                ),
+            )
+
+    def report(self, operation, size, default, fast):
+        megabytes = size / 1024 / 1024
+        self.stdout.write(
+            f"  {operation:<7} drf {default * 1000:8.2f}ms ({megabytes / default:6.1f} MiB/s)"
+            f"   fast {fast * 1000:8.2f}ms ({megabytes / fast:6.1f} MiB/s)"
+            f"   {default / fast:5.1f}x"
+        )
@@ -0,0 +1,82 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+
+from api.models import Schedule
+from api.search_results import search_results
+from api.serializers import ScheduleSearchSerializer
+from api.services import search_schedules
+from core.fastjson import FastJSONRenderer
+from core.instrumentation import record_queries
+
+
+def timed(function, iterations):
+    """
+    Fastest of `iterations` calls as (total seconds, seconds outside the database),
+    with the result and the query count
+    """
+    totals, serialization = [], []
+    for _ in range(iterations):
+        with record_queries() as recorder:
+            start = time.perf_counter()
+            result = function()
+            elapsed = time.perf_counter() - start
+        totals.append(elapsed)
+        serialization.append(elapsed - recorder.duration)
+    return min(totals), min(serialization), result, recorder.count
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare ScheduleSearchSerializer with the search_results() fast path on the "
+        "schedules of the busiest travel date (queries included)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--schedules",
+            type=int,
+            nargs="+",
+            default=[50, 200, 1000],
+            help="Result sizes to measure",
+        )
+        parser.add_argument("--iterations", type=int, default=10)
+
+    def handle(self, *args, **options):
+        busiest = (
+            Schedule.objects.filter(status="ACTIVE")
+            .values("travel_date")
+            .annotate(count=Count("id"))
+            .order_by("-count")
+            .first()
+        )
+        if busiest is None:
+            raise CommandError("No schedules, seed some with `manage.py seed_data`")
+        self.stdout.write(
+            f"{busiest['travel_date']}: {busiest['count']} active schedules"
+        )
+
+        # empty origin/destination match every route
+        search = search_schedules("", "", busiest["travel_date"])
+        for size in options["schedules"]:
+            page = search.schedules[:size]
+            serializer_time, serializer_cpu, expected, serializer_queries = timed(
+                # .all(): a fresh queryset each time, not the cached rows
+                lambda: ScheduleSearchSerializer(page.all(), many=True).data,
+                options["iterations"],
+            )
+            fast_time, fast_cpu, results, fast_queries = timed(
+                lambda: search_results(page.all(), search.buses), options["iterations"]
+            )
+            renderer = FastJSONRenderer()
+            identical = renderer.render(results) == renderer.render(expected)
+            self.stdout.write(
+                f"{len(results)} schedules, identical output: {'yes' if identical else 'NO'}\n"
+                f"  serializer {serializer_time * 1000:8.2f}ms, {serializer_cpu * 1000:8.2f}ms "
+                f"outside the database ({serializer_queries} queries)\n"
+                f"  fast path  {fast_time * 1000:8.2f}ms, {fast_cpu * 1000:8.2f}ms "
+                f"outside the database ({fast_queries} queries)\n"
+                f"  {serializer_time / fast_time:.1f}x faster, "
+                f"{serializer_cpu / fast_cpu:.1f}x outside the database"
+            )
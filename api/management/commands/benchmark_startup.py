@@ -0,0 +1,76 @@
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# import time: self [us] | cumulative [us] | module
+IMPORT_TIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+\d+ \|\s*(\S+)")
+
+
+class Command(BaseCommand):
+    help = "Measure the time a fresh interpreter needs to import the WSGI/ASGI application"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--module",
+            default="core.wsgi",
+            help="Module to import (core.wsgi or core.asgi)",
+        )
+        parser.add_argument("--runs", type=int, default=5)
+        parser.add_argument(
+            "--top",
+            type=int,
+            default=15,
+            help="Number of packages with the most import time to list",
+        )
+
+    def handle(self, *args, **options):
+        module = options["module"]
+        env = {
+            **os.environ,
+            "DJANGO_SETTINGS_MODULE": os.environ.get(
+                "DJANGO_SETTINGS_MODULE", "core.settings"
+            ),
+        }
+        command = [sys.executable, "-X", "importtime", "-c", f"import {module}"]
+
+        timings = []
+        package_times = Counter()
+        for _ in range(options["runs"]):
+            start = time.perf_counter()
+            result = subprocess.run(
+                command, cwd=settings.BASE_DIR, env=env, capture_output=True, text=True
+            )
+            timings.append(time.perf_counter() - start)
+            if result.returncode != 0:
+                raise CommandError(f"import {module} failed:\n{result.stderr[-2000:]}")
+
+            for line in result.stderr.splitlines():
+                match = IMPORT_TIME_LINE.match(line)
+                if match:
+                    package = match.group(2).split(".")[0]
+                    package_times[package] += int(match.group(1))
+
+        runs = options["runs"]
+        mean = statistics.mean(timings) * 1000
+        imports = sum(package_times.values()) / runs / 1000
+        self.stdout.write(
+            f"import {module}: min {min(timings) * 1000:.0f}ms, "
+            f"median {statistics.median(timings) * 1000:.0f}ms, "
+            f"max {max(timings) * 1000:.0f}ms over {runs} runs"
+        )
+        self.stdout.write(
+            f"  {imports:8.1f}ms  importing and executing modules\n"
+            f"  {mean - imports:8.1f}ms  interpreter start-up and shutdown"
+        )
+        # module bodies count as import time: django.setup() and the catalog
+        # warm-up run while core.wsgi is imported and show up under "core"
+        self.stdout.write("Import time by package (mean per run):")
+        for name, microseconds in package_times.most_common(options["top"]):
+            self.stdout.write(f"  {microseconds / runs / 1000:8.1f}ms  {name}")
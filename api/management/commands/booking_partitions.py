@@ -0,0 +1,52 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+from api.partitions import detach_old_partitions, ensure_partitions
+
+
+class Command(BaseCommand):
+    help = "Create upcoming booking/passenger partitions and detach old ones"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--months-ahead",
+            type=int,
+            default=3,
+            help="Create monthly partitions up to this many months ahead",
+        )
+        parser.add_argument(
+            "--retain-months",
+            type=int,
+            default=12,
+            help="Detach partitions older than this many months",
+        )
+        parser.add_argument(
+            "--drop",
+            action="store_true",
+            help="Drop detached partitions instead of keeping them as standalone tables",
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            self.stdout.write(
+                self.style.WARNING(
+                    f"Partitioning needs PostgreSQL, nothing to do on {connection.vendor}; "
+                    "old trips are archived by schedule_lifecycle"
+                )
+            )
+            return
+
+        created = ensure_partitions(months_ahead=options["months_ahead"])
+        for name in created:
+            self.stdout.write(f"Created partition {name}")
+
+        detached = detach_old_partitions(
+            retain_months=options["retain_months"], drop=options["drop"]
+        )
+        for name in detached:
+            self.stdout.write(f"Detached partition {name}")
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{len(created)} partitions created, {len(detached)} detached"
+            )
+        )
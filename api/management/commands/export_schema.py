@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from core.schema import export_schema, schema_dir
+
+
+class Command(BaseCommand):
+    help = "Generate the OpenAPI schema served by swagger.json/ and swagger.yaml/"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--output",
+            help="Directory to write to (defaults to SCHEMA_DIR)",
+        )
+
+    def handle(self, *args, **options):
+        directory = options["output"] or schema_dir()
+        for path in export_schema(directory):
+            self.stdout.write(f"  {path} ({path.stat().st_size} bytes)")
+        self.stdout.write(self.style.SUCCESS(f"Schema exported to {directory}"))
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from api.pricing import recompute_schedule_prices
+
+
+class Command(BaseCommand):
+    help = "Recompute prices of upcoming schedules from load factor and days to departure"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of schedules repriced per batch",
+        )
+
+    def handle(self, *args, **options):
+        updated = recompute_schedule_prices(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Updated prices of {updated} schedules"))
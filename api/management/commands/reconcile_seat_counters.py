@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+from api.services import reconcile_seat_counters
+
+
+class Command(BaseCommand):
+    help = "Verify seat counters on bus assignments and schedules against bookings"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--fix",
+            action="store_true",
+            help="Repair counters that drifted from the bookings",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of rows checked per batch",
+        )
+
+    def handle(self, *args, **options):
+        assignments, schedules = reconcile_seat_counters(
+            fix=options["fix"], batch_size=options["batch_size"]
+        )
+
+        if not assignments and not schedules:
+            self.stdout.write(self.style.SUCCESS("All seat counters are consistent"))
+            return
+
+        action = "Repaired" if options["fix"] else "Found drift in"
+        self.stdout.write(
+            self.style.WARNING(
+                f"{action} {assignments} bus assignments and {schedules} schedules"
+            )
+        )
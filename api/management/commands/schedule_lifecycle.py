@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand
+from api.lifecycle import archive_finished_schedules, complete_past_schedules
+
+
+class Command(BaseCommand):
+    help = "Complete schedules that already arrived and archive old finished trips"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Number of schedules processed per transaction",
+        )
+        parser.add_argument(
+            "--archive-after-days",
+            type=int,
+            default=30,
+            help="Archive completed/cancelled schedules older than this many days",
+        )
+        parser.add_argument(
+            "--no-archive",
+            action="store_true",
+            help="Only transition schedules to COMPLETED, don't archive",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+
+        completed = complete_past_schedules(batch_size=batch_size)
+        self.stdout.write(f"Marked {completed} schedules as COMPLETED")
+
+        if options["no_archive"]:
+            return
+
+        archived = archive_finished_schedules(
+            older_than_days=options["archive_after_days"], batch_size=batch_size
+        )
+        self.stdout.write(
+            self.style.SUCCESS(f"Archived {archived} finished schedules")
+        )
@@ -0,0 +1,85 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.seeding import MAX_SEED, Seeder, is_seeded
+
+
+class Command(BaseCommand):
+    help = "Generate a deterministic synthetic dataset (network, schedules, bookings)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--seed", type=int, default=1, help="Random seed")
+        parser.add_argument("--routes", type=int, default=30)
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=14,
+            help="Days of schedules to generate, starting today",
+        )
+        parser.add_argument("--companies", type=int, default=5)
+        parser.add_argument("--buses-per-company", type=int, default=12)
+        parser.add_argument(
+            "--templates-per-route",
+            type=int,
+            default=2,
+            help="Daily departures per route (max 10)",
+        )
+        parser.add_argument(
+            "--occupancy",
+            type=float,
+            default=0.3,
+            help="Average share of seats booked",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=5000,
+            help="Rows written per chunk",
+        )
+        parser.add_argument(
+            "--no-copy",
+            action="store_true",
+            help="Use bulk_create instead of COPY on PostgreSQL",
+        )
+
+    def handle(self, *args, **options):
+        if not 0 <= options["seed"] <= MAX_SEED:
+            raise CommandError(f"--seed must be between 0 and {MAX_SEED}")
+        if is_seeded(options["seed"]):
+            raise CommandError(f"Dataset for seed {options['seed']} already exists")
+        if not 1 <= options["templates_per_route"] <= 10:
+            raise CommandError("--templates-per-route must be between 1 and 10")
+
+        def progress(seeder):
+            if options["verbosity"] >= 2:
+                total = sum(seeder.counts.values())
+                self.stdout.write(f"{total:,} rows written", ending="\r")
+
+        seeder = Seeder(
+            seed=options["seed"],
+            chunk_size=options["chunk_size"],
+            use_copy=False if options["no_copy"] else None,
+            progress=progress,
+        )
+        start = time.perf_counter()
+        counts = seeder.run(
+            routes=options["routes"],
+            days=options["days"],
+            companies=options["companies"],
+            buses_per_company=options["buses_per_company"],
+            templates_per_route=options["templates_per_route"],
+            occupancy=options["occupancy"],
+        )
+        elapsed = time.perf_counter() - start
+
+        for name, count in counts.items():
+            self.stdout.write(f"{name:<20} {count:>12,}")
+        total = sum(counts.values())
+        method = "COPY" if seeder.use_copy else "bulk_create"
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Created {total:,} rows in {elapsed:.1f}s ({total / elapsed:,.0f} rows/s, "
+                f"{method} {total / seeder.elapsed:,.0f} rows/s)"
+            )
+        )
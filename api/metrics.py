@@ -0,0 +1,24 @@
+from core.metrics import Counter, Histogram
+
+BOOKINGS = Counter(
+    "bookings_total",
+    "Booking attempts by outcome (success, conflict, failure)",
+    ["outcome"],
+)
+
+SEAT_LOCK_WAIT = Histogram(
+    "booking_seat_lock_wait_seconds",
+    "Time waiting for the bus assignment row lock when booking",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+
+CATALOG_CACHE_REQUESTS = Counter(
+    "catalog_cache_requests_total",
+    "Catalog response cache lookups by model and outcome (hit, miss)",
+    ["namespace", "outcome"],
+)
+
+CATALOG_SNAPSHOT_LOADS = Counter(
+    "catalog_snapshot_loads_total",
+    "Rebuilds of the in-process route catalog used by search and booking",
+)
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.7 on 2026-10-19 00:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_alter_booking_bus_assignment_alter_booking_user'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScheduleArchive',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('schedule_id', models.BigIntegerField(unique=True)),
+                ('template_id', models.BigIntegerField(blank=True, null=True)),
+                ('route_origin', models.CharField(max_length=255)),
+                ('route_destination', models.CharField(max_length=255)),
+                ('travel_date', models.DateField()),
+                ('departure_time', models.TimeField()),
+                ('arrival_time', models.TimeField()),
+                ('price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('status', models.CharField(max_length=10)),
+                ('total_bookings', models.PositiveIntegerField(default=0)),
+                ('bus_assignments', models.JSONField(default=list)),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['travel_date'], name='api_schedul_travel__4b6b5b_idx'), models.Index(fields=['route_origin', 'route_destination', 'travel_date'], name='api_schedul_route_o_d35e09_idx')],
+            },
+        ),
+    ]
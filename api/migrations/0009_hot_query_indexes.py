@@ -0,0 +1,35 @@
+# Generated by Django 5.2.7 on 2026-10-19 00:27
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_schedulearchive'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['bus_assignment', 'is_paid'], name='api_booking_bus_ass_c8f5a9_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='route',
+            index=models.Index(fields=['origin', 'destination'], name='api_route_origin_9ba2be_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='schedule',
+            index=models.Index(fields=['travel_date', 'status'], name='api_schedul_travel__143108_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='schedule',
+            index=models.Index(fields=['template', 'travel_date'], name='api_schedul_templat_a9c961_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='scheduletemplate',
+            index=models.Index(fields=['route', 'is_active'], name='api_schedul_route_i_8deb71_idx'),
+        ),
+    ]
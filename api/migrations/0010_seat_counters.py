@@ -0,0 +1,75 @@
+# Generated by Django 5.2.7 on 2026-10-19 00:29
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def populate_seat_counters(apps, schema_editor):
+    BusAssignment = apps.get_model("api", "BusAssignment")
+    Schedule = apps.get_model("api", "Schedule")
+    Booking = apps.get_model("api", "Booking")
+
+    counts = {
+        "held_seats": Count("id", filter=Q(is_paid=False)),
+        "paid_seats": Count("id", filter=Q(is_paid=True)),
+    }
+
+    for row in Booking.objects.values("bus_assignment_id").annotate(**counts):
+        assignment = BusAssignment.objects.select_related("bus").get(
+            pk=row["bus_assignment_id"]
+        )
+        booked = row["held_seats"] + row["paid_seats"]
+        BusAssignment.objects.filter(pk=assignment.pk).update(
+            held_seats=row["held_seats"],
+            paid_seats=row["paid_seats"],
+            booked_seats=booked,
+            available_seats=max(assignment.bus.total_seats - booked, 0),
+        )
+
+    for row in Booking.objects.values("schedule_id").annotate(**counts):
+        Schedule.objects.filter(pk=row["schedule_id"]).update(
+            held_seats=row["held_seats"],
+            paid_seats=row["paid_seats"],
+            booked_seats=row["held_seats"] + row["paid_seats"],
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='busassignment',
+            name='booked_seats',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='busassignment',
+            name='held_seats',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='busassignment',
+            name='paid_seats',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='schedule',
+            name='booked_seats',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='schedule',
+            name='held_seats',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='schedule',
+            name='paid_seats',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(populate_seat_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,75 @@
+# Generated by Django 5.2.7 on 2026-10-19 00:30
+
+import logging
+import re
+
+from django.db import migrations, models
+
+logger = logging.getLogger(__name__)
+
+# flag values at the time of this migration
+AMENITY_FLAGS = {
+    "AC": 1 << 0,
+    "WIFI": 1 << 1,
+    "USB_CHARGING": 1 << 2,
+    "TOILET": 1 << 3,
+    "TV": 1 << 4,
+    "RECLINING_SEATS": 1 << 5,
+    "REFRESHMENTS": 1 << 6,
+    "BLANKET": 1 << 7,
+}
+
+
+def parse_amenities(text):
+    """(flags, unrecognized names) of free text like ("AC", "WIFI") or AC, Wi-Fi"""
+    flags = 0
+    unparsed = []
+    for token in re.findall(r"[A-Za-z][A-Za-z _-]*", text):
+        name = re.sub(r"[\s-]+", "_", token.strip()).upper()
+        name = name.replace("WI_FI", "WIFI")
+        if name in AMENITY_FLAGS:
+            flags |= AMENITY_FLAGS[name]
+        else:
+            unparsed.append(token.strip())
+    return flags, unparsed
+
+
+def amenities_text_to_flags(apps, schema_editor):
+    Bus = apps.get_model("api", "Bus")
+    for bus in Bus.objects.exclude(amenities=""):
+        flags, unparsed = parse_amenities(bus.amenities)
+        if unparsed:
+            # the amenities column is dropped below, keep a record of what is lost
+            logger.warning(
+                "Bus %s (%s): dropping unrecognized amenities %s of %r",
+                bus.pk,
+                bus.plate_number,
+                ", ".join(unparsed),
+                bus.amenities,
+            )
+        Bus.objects.filter(pk=bus.pk).update(amenity_flags=flags)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_seat_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bus',
+            name='amenity_flags',
+            field=models.PositiveIntegerField(db_index=True, default=0),
+        ),
+        migrations.RunPython(amenities_text_to_flags, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='bus',
+            name='amenities',
+        ),
+        migrations.AlterField(
+            model_name='bus',
+            name='bus_type',
+            field=models.CharField(db_index=True, max_length=100),
+        ),
+    ]
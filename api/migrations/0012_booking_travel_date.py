@@ -0,0 +1,62 @@
+# Generated by Django 5.2.7 on 2026-10-19 01:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def populate_travel_dates(apps, schema_editor):
+    Booking = apps.get_model("api", "Booking")
+    Passenger = apps.get_model("api", "Passenger")
+    Schedule = apps.get_model("api", "Schedule")
+
+    Booking.objects.update(
+        travel_date=Subquery(
+            Schedule.objects.filter(pk=OuterRef("schedule_id")).values("travel_date")[:1]
+        )
+    )
+    Passenger.objects.update(
+        travel_date=Subquery(
+            Booking.objects.filter(pk=OuterRef("booking_id")).values("travel_date")[:1]
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0011_bus_amenity_flags'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='booking',
+            name='travel_date',
+            field=models.DateField(null=True),
+        ),
+        migrations.AddField(
+            model_name='passenger',
+            name='travel_date',
+            field=models.DateField(null=True),
+        ),
+        migrations.RunPython(populate_travel_dates, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='booking',
+            name='travel_date',
+            field=models.DateField(),
+        ),
+        migrations.AlterField(
+            model_name='passenger',
+            name='travel_date',
+            field=models.DateField(),
+        ),
+        migrations.AlterField(
+            model_name='passenger',
+            name='booking',
+            field=models.OneToOneField(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='passenger', to='api.booking'),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['bus_assignment', 'travel_date'], name='api_booking_bus_ass_460ee8_idx'),
+        ),
+    ]
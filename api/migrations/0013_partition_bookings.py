@@ -0,0 +1,23 @@
+from django.db import migrations
+
+from api.partitions import PARTITIONED_TABLES, convert_to_partitioned
+
+
+def partition_tables(apps, schema_editor):
+    # native partitioning is PostgreSQL only, see api/partitions.py
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    with schema_editor.connection.cursor() as cursor:
+        for table in PARTITIONED_TABLES:
+            convert_to_partitioned(cursor, table)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0012_booking_travel_date'),
+    ]
+
+    operations = [
+        migrations.RunPython(partition_tables, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.7 on 2026-10-19 01:22
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0014_catalogversion'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='route',
+            name='api_route_origin_9ba2be_idx',
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-19 01:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0015_drop_route_origin_index'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='bus',
+            name='amenity_flags',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
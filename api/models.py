@@ -20,18 +20,45 @@ class BusCompany(models.Model):
         return self.name
 
 
+# bus amenities stored as bit flags in Bus.amenity_flags
+AMENITY_FLAGS = {
+    "AC": 1 << 0,
+    "WIFI": 1 << 1,
+    "USB_CHARGING": 1 << 2,
+    "TOILET": 1 << 3,
+    "TV": 1 << 4,
+    "RECLINING_SEATS": 1 << 5,
+    "REFRESHMENTS": 1 << 6,
+    "BLANKET": 1 << 7,
+}
+
+
+def amenities_to_flags(names):
+    flags = 0
+    for name in names:
+        flags |= AMENITY_FLAGS[name]
+    return flags
+
+
+def flags_to_amenities(flags):
+    return [name for name, flag in AMENITY_FLAGS.items() if flags & flag]
+
+
 class Bus(models.Model):
     company = models.ForeignKey(
         BusCompany, on_delete=models.CASCADE, related_name="buses"
     )
     plate_number = models.CharField(max_length=20, unique=True)
-    bus_type = models.CharField(max_length=100)
+    bus_type = models.CharField(max_length=100, db_index=True)
     total_seats = models.PositiveIntegerField()
-    amenities = models.TextField(
-        blank=True
-    )  # inserted like dictionary ("AC", "WIFI", ....)
+    # filtered with a bitwise and (see services.matching_buses), which no B-tree index serves
+    amenity_flags = models.PositiveIntegerField(default=0)
     is_active = models.BooleanField(default=True)
 
+    @property
+    def amenities(self):
+        return flags_to_amenities(self.amenity_flags)
+
     def __str__(self):
         return f"{self.plate_number} ({self.company.name})"
 
@@ -42,6 +69,9 @@ class Route(models.Model):
     distance_km = models.PositiveIntegerField(blank=True, null=True)
     estimated_duration_minutes = models.PositiveIntegerField(null=True)
 
+    # no index on origin/destination: search matches substrings of them in the
+    # in-process catalog (api/catalog.py), the database only joins routes by id
+
     def __str__(self):
         return f"{self.origin} → {self.destination}"
 
@@ -69,6 +99,9 @@ class ScheduleTemplate(models.Model):
     )
     is_active = models.BooleanField(default=True)
 
+    class Meta:
+        indexes = [models.Index(fields=["route", "is_active"])]
+
     def __str__(self):
         return f"{self.route} @ {self.departure_time}"
 
@@ -94,12 +127,39 @@ class Schedule(models.Model):
     )
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="ACTIVE")
 
+    # seat counters across all bus assignments, kept in sync by api.services
+    held_seats = models.PositiveIntegerField(default=0)  # booked, not paid yet
+    paid_seats = models.PositiveIntegerField(default=0)
+    booked_seats = models.PositiveIntegerField(default=0)  # held + paid
+
+    class Meta:
+        indexes = [
+            # search and lifecycle filters
+            models.Index(fields=["travel_date", "status"]),
+            # schedule generation checks per template and day
+            models.Index(fields=["template", "travel_date"]),
+        ]
+
     # If price is not set, inherit from template
     def save(self, *args, **kwargs):
         if not self.price:
             self.price = self.template.base_price
+
+        update_fields = kwargs.get("update_fields")
+        previous_date = None
+        if self.pk and (update_fields is None or "travel_date" in update_fields):
+            previous_date = (
+                Schedule.objects.filter(pk=self.pk).values_list("travel_date", flat=True).first()
+            )
         super().save(*args, **kwargs)
 
+        # bookings and passengers keep a copy of the date as their partition key
+        if previous_date is not None and previous_date != self.travel_date:
+            Booking.objects.filter(schedule=self).update(travel_date=self.travel_date)
+            Passenger.objects.filter(booking__schedule=self).update(
+                travel_date=self.travel_date
+            )
+
     def __str__(self):
         return f"{self.template.route} | {self.travel_date}"
 
@@ -120,6 +180,11 @@ class BusAssignment(models.Model):
     available_seats = models.PositiveIntegerField()
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="ACTIVE")
 
+    # seat counters, kept in sync by api.services (available = total - booked)
+    held_seats = models.PositiveIntegerField(default=0)  # booked, not paid yet
+    paid_seats = models.PositiveIntegerField(default=0)
+    booked_seats = models.PositiveIntegerField(default=0)  # held + paid
+
     class Meta:
         unique_together = ("schedule", "bus")
 
@@ -148,12 +213,23 @@ class Booking(models.Model):
 
     is_paid = models.BooleanField(default=False)
     booked_at = models.DateTimeField(auto_now_add=True)
+    # copy of schedule.travel_date, the partition key on PostgreSQL (see api/partitions.py)
+    travel_date = models.DateField()
 
     if TYPE_CHECKING:
         passenger: "Passenger"
 
     class Meta:
         unique_together = ("bus_assignment", "seat_number")
+        indexes = [
+            models.Index(fields=["bus_assignment", "is_paid"]),
+            models.Index(fields=["bus_assignment", "travel_date"]),
+        ]
+
+    def save(self, *args, **kwargs):
+        if self.travel_date is None:
+            self.travel_date = self.schedule.travel_date
+        super().save(*args, **kwargs)
 
     def __str__(self):
         if self.user:
@@ -186,8 +262,10 @@ class Passenger(models.Model):
         ("F", "Female"),
     ]
 
+    # no database level foreign key: on PostgreSQL both tables are partitioned and
+    # booking ids are only unique together with the travel date
     booking = models.OneToOneField(
-        Booking, on_delete=models.CASCADE, related_name="passenger"
+        Booking, on_delete=models.CASCADE, related_name="passenger", db_constraint=False
     )
     first_name = models.CharField(max_length=200)
     last_name = models.CharField(max_length=200)
@@ -198,6 +276,14 @@ class Passenger(models.Model):
     nationality = models.CharField(max_length=50)
     boarding_point = models.CharField(max_length=200)
     dropping_point = models.CharField(max_length=200)
+    # copy of booking.travel_date, the partition key on PostgreSQL; Schedule.save() and
+    # services.save_booking() keep it up to date
+    travel_date = models.DateField()
+
+    def save(self, *args, **kwargs):
+        if self.travel_date is None:
+            self.travel_date = self.booking.travel_date
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return f"{self.first_name} {self.last_name}"
@@ -237,3 +323,39 @@ class PromoCode(models.Model):
 
     def __str__(self):
         return self.code
+
+
+# compact history of completed trips moved out of the live tables
+class ScheduleArchive(models.Model):
+    schedule_id = models.BigIntegerField(unique=True)
+    template_id = models.BigIntegerField(null=True, blank=True)
+    route_origin = models.CharField(max_length=255)
+    route_destination = models.CharField(max_length=255)
+    travel_date = models.DateField()
+    departure_time = models.TimeField()
+    arrival_time = models.TimeField()
+    price = models.DecimalField(max_digits=10, decimal_places=2)
+    status = models.CharField(max_length=10)
+    total_bookings = models.PositiveIntegerField(default=0)
+    # bus assignments with their bookings and passengers, stored as a list of dicts
+    bus_assignments = models.JSONField(default=list)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["travel_date"]),
+            models.Index(fields=["route_origin", "route_destination", "travel_date"]),
+        ]
+
+    def __str__(self):
+        return f"{self.route_origin} → {self.route_destination} | {self.travel_date} (archived)"
+
+
+# single row change counter for the route network, bumped on every
+# Route/RouteStop/ScheduleTemplate change (see api/catalog.py)
+class CatalogVersion(models.Model):
+    version = models.PositiveBigIntegerField(default=1)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Catalog v{self.version}"
@@ -0,0 +1,213 @@
+"""
+Travel-date partitioning of bookings and passengers.
+
+On PostgreSQL api_booking and api_passenger are native RANGE partitioned tables with one
+partition per month of travel_date plus a default partition. The primary keys and unique
+constraints include travel_date (PostgreSQL requires the partition key in them), the ORM
+keeps using `id`. Future partitions are created ahead of time and old ones detached
+by the `booking_partitions` command.
+
+Bookings and passengers carry a copy of the schedule's travel_date as partition key;
+Schedule.save() and services.save_booking() update the copies when a trip moves to
+another date (queryset.update() on schedules doesn't). Passenger.booking has no
+database level foreign key since booking ids are only unique with the travel date,
+deleting passengers along with their booking is left to the ORM.
+
+Other databases have no native partitioning: there the (bus_assignment, travel_date)
+index keeps lookups bounded and old trips are moved out by the schedule archival
+(see api/lifecycle.py); ensure_partitions() and detach_old_partitions() do nothing.
+"""
+
+from datetime import date, timedelta
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+PARTITIONED_TABLES = ["api_booking", "api_passenger"]
+PARTITION_KEY = "travel_date"
+
+
+def month_start(day):
+    return day.replace(day=1)
+
+
+def next_month(day):
+    return (day.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def add_months(day, months):
+    month_index = day.year * 12 + day.month - 1 + months
+    return date(month_index // 12, month_index % 12 + 1, 1)
+
+
+def partition_name(table, month):
+    return f"{table}_p{month.year}_{month.month:02d}"
+
+
+def is_partitioned(cursor, table):
+    cursor.execute(
+        "SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s)",
+        [table],
+    )
+    return cursor.fetchone() is not None
+
+
+def create_month_partition(cursor, table, month):
+    """
+    Create the partition for `month` if it doesn't exist yet. Rows already stored in
+    the default partition for that month are moved into the new partition.
+    """
+    name = partition_name(table, month)
+    cursor.execute("SELECT to_regclass(%s)", [name])
+    if cursor.fetchone()[0] is not None:
+        return False
+
+    start, end = month, next_month(month)
+    cursor.execute(
+        f'CREATE TABLE "{name}" (LIKE "{table}" INCLUDING DEFAULTS INCLUDING CONSTRAINTS)'
+    )
+    cursor.execute(
+        f'WITH moved AS (DELETE FROM "{table}_default" '
+        f"WHERE {PARTITION_KEY} >= %s AND {PARTITION_KEY} < %s RETURNING *) "
+        f'INSERT INTO "{name}" SELECT * FROM moved',
+        [start, end],
+    )
+    cursor.execute(
+        f'ALTER TABLE "{table}" ATTACH PARTITION "{name}" '
+        f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+    )
+    return True
+
+
+def convert_to_partitioned(cursor, table, months_ahead=3, today=None):
+    """
+    Replace a regular table by a RANGE partitioned one with the same columns,
+    indexes and foreign keys. Used by the migration that enables partitioning.
+    """
+    legacy = f"{table}_unpartitioned"
+    today = today or timezone.localdate()
+
+    cursor.execute(
+        "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+        "WHERE conrelid = %s::regclass AND contype = 'f'",
+        [table],
+    )
+    foreign_keys = cursor.fetchall()
+    cursor.execute(
+        "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+        "WHERE conrelid = %s::regclass AND contype = 'u'",
+        [table],
+    )
+    unique_constraints = cursor.fetchall()
+    cursor.execute(
+        "SELECT indexdef FROM pg_indexes i JOIN pg_class c ON c.relname = i.indexname "
+        "JOIN pg_index x ON x.indexrelid = c.oid "
+        "WHERE i.tablename = %s AND NOT x.indisunique",
+        [table],
+    )
+    indexes = [row[0] for row in cursor.fetchall()]
+
+    cursor.execute(f'ALTER TABLE "{table}" RENAME TO "{legacy}"')
+    cursor.execute(
+        f'CREATE TABLE "{table}" (LIKE "{legacy}" INCLUDING DEFAULTS INCLUDING CONSTRAINTS) '
+        f"PARTITION BY RANGE ({PARTITION_KEY})"
+    )
+    cursor.execute(f'CREATE TABLE "{table}_default" PARTITION OF "{table}" DEFAULT')
+
+    cursor.execute(f'SELECT MIN({PARTITION_KEY}) FROM "{legacy}"')
+    first = cursor.fetchone()[0] or today
+    month, last = month_start(min(first, today)), add_months(today, months_ahead)
+    while month <= last:
+        create_month_partition(cursor, table, month)
+        month = next_month(month)
+
+    cursor.execute(f'INSERT INTO "{table}" SELECT * FROM "{legacy}"')
+    cursor.execute(f'DROP TABLE "{legacy}"')
+
+    # the identity sequence went away with the old table
+    sequence = f"{table}_id_seq"
+    cursor.execute(f'CREATE SEQUENCE "{sequence}" OWNED BY "{table}".id')
+    cursor.execute(
+        f"SELECT setval('\"{sequence}\"', COALESCE(MAX(id), 0) + 1, false) FROM \"{table}\""
+    )
+    cursor.execute(
+        f"ALTER TABLE \"{table}\" ALTER COLUMN id SET DEFAULT nextval('\"{sequence}\"')"
+    )
+
+    cursor.execute(
+        f'ALTER TABLE "{table}" ADD CONSTRAINT "{table}_pkey" '
+        f"PRIMARY KEY (id, {PARTITION_KEY})"
+    )
+    for name, definition in unique_constraints:
+        columns = definition[definition.index("(") + 1 : definition.rindex(")")]
+        cursor.execute(
+            f'ALTER TABLE "{table}" ADD CONSTRAINT "{name}" '
+            f"UNIQUE ({columns}, {PARTITION_KEY})"
+        )
+    # index definitions were read before the rename, so they target the new table
+    for definition in indexes:
+        cursor.execute(definition)
+    for name, definition in foreign_keys:
+        cursor.execute(f'ALTER TABLE "{table}" ADD CONSTRAINT "{name}" {definition}')
+
+
+def month_partitions(cursor, table):
+    """Monthly partitions of a table as (name, first day of month)"""
+    cursor.execute(
+        "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = %s::regclass",
+        [table],
+    )
+    partitions = []
+    prefix = f"{table}_p"
+    for (name,) in cursor.fetchall():
+        if not name.startswith(prefix):
+            continue
+        year, month = name[len(prefix) :].split("_")
+        partitions.append((name, date(int(year), int(month), 1)))
+    return sorted(partitions, key=lambda partition: partition[1])
+
+
+def ensure_partitions(months_ahead=3, today=None):
+    """Create missing monthly partitions up to `months_ahead` months from now"""
+    if connection.vendor != "postgresql":
+        return []
+
+    today = today or timezone.localdate()
+    created = []
+    with transaction.atomic(), connection.cursor() as cursor:
+        for table in PARTITIONED_TABLES:
+            if not is_partitioned(cursor, table):
+                continue
+            month, last = month_start(today), add_months(today, months_ahead)
+            while month <= last:
+                if create_month_partition(cursor, table, month):
+                    created.append(partition_name(table, month))
+                month = next_month(month)
+    return created
+
+
+def detach_old_partitions(retain_months=12, drop=False, today=None):
+    """
+    Detach partitions for months older than `retain_months`. Detached tables keep their
+    rows (for dumps or reporting) unless drop=True.
+    """
+    if connection.vendor != "postgresql":
+        return []
+
+    today = today or timezone.localdate()
+    cutoff = add_months(month_start(today), -retain_months)
+
+    detached = []
+    with transaction.atomic(), connection.cursor() as cursor:
+        for table in PARTITIONED_TABLES:
+            if not is_partitioned(cursor, table):
+                continue
+            for name, month in month_partitions(cursor, table):
+                if month >= cutoff:
+                    break
+                cursor.execute(f'ALTER TABLE "{table}" DETACH PARTITION "{name}"')
+                if drop:
+                    cursor.execute(f'DROP TABLE "{name}"')
+                detached.append(name)
+    return detached
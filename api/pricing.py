@@ -0,0 +1,103 @@
+from datetime import timedelta
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q, Sum
+from django.utils import timezone
+
+from .models import Schedule
+
+
+def get_pricing_rules():
+    rules = settings.PRICING
+    return {
+        "horizon_days": rules["HORIZON_DAYS"],
+        "load_factor": sorted(
+            (float(threshold), Decimal(multiplier))
+            for threshold, multiplier in rules["LOAD_FACTOR_RULES"]
+        ),
+        "days_to_departure": sorted(
+            (int(days), Decimal(multiplier))
+            for days, multiplier in rules["DAYS_TO_DEPARTURE_RULES"]
+        ),
+        "min_multiplier": Decimal(rules["MIN_MULTIPLIER"]),
+        "max_multiplier": Decimal(rules["MAX_MULTIPLIER"]),
+        "round_to": Decimal(rules["ROUND_TO"]),
+    }
+
+
+def compute_price(base_price: Decimal, load_factor: float, days_to_departure: int, rules) -> Decimal:
+    """Price for a schedule given how full it is and how soon it departs"""
+    multiplier = Decimal("1")
+
+    for threshold, value in rules["load_factor"]:
+        if load_factor >= threshold:
+            multiplier = value
+
+    for max_days, value in rules["days_to_departure"]:
+        if days_to_departure <= max_days:
+            multiplier *= value
+            break
+
+    multiplier = min(max(multiplier, rules["min_multiplier"]), rules["max_multiplier"])
+
+    round_to = rules["round_to"]
+    price = (base_price * multiplier / round_to).quantize(
+        Decimal("1"), rounding=ROUND_HALF_UP
+    ) * round_to
+    return price.quantize(Decimal("0.01"))
+
+
+def recompute_schedule_prices(today=None, batch_size=1000):
+    """
+    Reprice every ACTIVE schedule inside the pricing horizon.
+    Load factors are aggregated in one query per batch and changed prices are
+    written back with bulk_update, so the cost doesn't depend on booking volume.
+    Returns the number of schedules whose price changed.
+    """
+    rules = get_pricing_rules()
+    today = today or timezone.localdate()
+    horizon = today + timedelta(days=rules["horizon_days"])
+
+    active_buses = Q(bus_assignments__status="ACTIVE")
+    upcoming = (
+        Schedule.objects.filter(
+            status="ACTIVE", travel_date__gte=today, travel_date__lte=horizon
+        )
+        .order_by("id")
+        .values("id", "price", "travel_date", "template__base_price")
+        .annotate(
+            total_seats=Sum("bus_assignments__bus__total_seats", filter=active_buses),
+            booked_seats=Sum("bus_assignments__booked_seats", filter=active_buses),
+        )
+    )
+
+    updated = 0
+    last_id = 0
+    while True:
+        rows = list(upcoming.filter(id__gt=last_id)[:batch_size])
+        if not rows:
+            break
+        last_id = rows[-1]["id"]
+
+        changed = []
+        for row in rows:
+            total = row["total_seats"] or 0
+            load_factor = (row["booked_seats"] or 0) / total if total else 0.0
+
+            price = compute_price(
+                row["template__base_price"],
+                load_factor,
+                (row["travel_date"] - today).days,
+                rules,
+            )
+            if price != row["price"]:
+                changed.append(Schedule(id=row["id"], price=price))
+
+        if changed:
+            with transaction.atomic():
+                Schedule.objects.bulk_update(changed, ["price"])
+            updated += len(changed)
+
+    return updated
@@ -0,0 +1,115 @@
+"""
+Fast path for serializing search results.
+
+ScheduleSearchSerializer builds a nested BusAssignmentSerializer and walks dotted
+sources such as `template.route.__str__` and `bus.company.name` on model instances for
+every row. search_results() returns the same data from values_list() rows of two
+queries. Each value is converted by a mapper taken from the matching field of those
+serializers (its to_representation, or none where the database value already is the
+representation), so prices, dates, times and amenities are formatted by the same code.
+
+The column lists below must follow the serializers' fields; _mappers() fails loudly
+when they diverge and FastSearchSerializationTests compares the rendered output of
+both paths.
+"""
+
+from collections import defaultdict
+from functools import cache
+
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework import serializers
+
+from .models import Route
+from .serializers import BusAssignmentSerializer, ScheduleSearchSerializer
+
+# output field -> values_list() lookup, in the order of the serializer's fields
+SCHEDULE_COLUMNS = {
+    "id": "id",
+    "route": "template__route_id",  # replaced by the label of the route
+    "route_origin": "template__route__origin",
+    "route_destination": "template__route__destination",
+    "travel_date": "travel_date",
+    "departure_time": "departure_time",
+    "arrival_time": "arrival_time",
+    "price": "price",
+}
+BUS_COLUMNS = {
+    "id": "id",
+    "bus_plate": "bus__plate_number",
+    "bus_type": "bus__bus_type",
+    "company_name": "bus__company__name",
+    "total_seats": "bus__total_seats",
+    "amenities": "bus__amenity_flags",
+    "available_seats": "available_seats",
+    "status": "status",
+}
+
+# str() of a str and int() of an int change nothing, skip the call
+PASSTHROUGH_FIELDS = (serializers.CharField, serializers.IntegerField)
+
+
+def _field_mappers(serializer, columns, nested=()):
+    # nested fields are filled in separately, after the columns
+    if list(serializer.fields) != [*columns, *nested]:
+        raise ImproperlyConfigured(
+            f"{type(serializer).__name__} fields {list(serializer.fields)} don't match "
+            f"the fast path columns {[*columns, *nested]}"
+        )
+    return tuple(
+        None if type(field) in PASSTHROUGH_FIELDS else field.to_representation
+        for name, field in serializer.fields.items()
+        if name in columns
+    )
+
+
+@cache
+def _mappers():
+    return (
+        _field_mappers(ScheduleSearchSerializer(), SCHEDULE_COLUMNS, nested=["buses"]),
+        _field_mappers(BusAssignmentSerializer(), BUS_COLUMNS),
+    )
+
+
+def _convert(names, mappers, row):
+    # None stays None, like Serializer.to_representation does
+    return {
+        name: value if mapper is None or value is None else mapper(value)
+        for name, mapper, value in zip(names, mappers, row)
+    }
+
+
+def search_results(schedules, buses):
+    """
+    ScheduleSearchSerializer(schedules, many=True).data for the schedules and buses of
+    a search_schedules() ScheduleSearch; the schedules may be sliced
+    """
+    schedule_mappers, bus_mappers = _mappers()
+
+    rows = list(
+        schedules.prefetch_related(None).values_list(*SCHEDULE_COLUMNS.values())
+    )
+    if not rows:
+        return []
+
+    buses_by_schedule = defaultdict(list)
+    bus_rows = (
+        buses.filter(schedule_id__in=[row[0] for row in rows])
+        .order_by("id")
+        .values_list("schedule_id", *BUS_COLUMNS.values())
+    )
+    for schedule_id, *row in bus_rows:
+        buses_by_schedule[schedule_id].append(_convert(BUS_COLUMNS, bus_mappers, row))
+
+    route_labels = {}
+    results = []
+    for row in rows:
+        route_id = row[1]
+        if route_id not in route_labels:
+            route = Route(id=route_id, origin=row[2], destination=row[3])
+            route_labels[route_id] = str(route)
+
+        result = _convert(SCHEDULE_COLUMNS, schedule_mappers, row)
+        result["route"] = route_labels[route_id]
+        result["buses"] = buses_by_schedule[row[0]]
+        results.append(result)
+    return results
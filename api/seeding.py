@@ -0,0 +1,417 @@
+"""
+Deterministic synthetic dataset for benchmarks and capacity tests: the same seed always
+produces the same companies, buses, routes, schedules, bookings and passengers, so runs
+on different machines or commits are comparable.
+
+Rows are generated day by day and written in chunks with bulk_create, or with COPY on
+PostgreSQL, so memory stays bounded for production-sized datasets. Primary keys are
+assigned up front which lets related rows be generated without reading ids back.
+"""
+
+import io
+import math
+import random
+import time
+from collections import Counter
+from datetime import datetime, time as dt_time, timedelta
+from decimal import Decimal
+
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+from faker import Faker
+
+from . import catalog
+from .cache import invalidate, namespace_for
+from .models import (
+    AMENITY_FLAGS,
+    Booking,
+    Bus,
+    BusAssignment,
+    BusCompany,
+    Passenger,
+    Route,
+    RouteStop,
+    Schedule,
+    ScheduleTemplate,
+)
+from .partitions import ensure_partitions
+
+CITIES = [
+    "Dar es Salaam",
+    "Arusha",
+    "Mwanza",
+    "Dodoma",
+    "Mbeya",
+    "Morogoro",
+    "Tanga",
+    "Moshi",
+    "Iringa",
+    "Kigoma",
+    "Tabora",
+    "Songea",
+    "Musoma",
+    "Singida",
+    "Shinyanga",
+    "Mtwara",
+    "Bukoba",
+    "Sumbawanga",
+    "Lindi",
+    "Njombe",
+]
+
+BUS_TYPES = ["Luxury", "Semi-Luxury", "VIP", "Ordinary"]
+SEAT_LAYOUTS = [30, 45, 57, 60]
+DEPARTURE_HOURS = [5, 6, 7, 9, 11, 13, 15, 18, 21, 22]
+
+# models in insert order, parents before children
+SEEDED_MODELS = [
+    BusCompany,
+    Bus,
+    Route,
+    RouteStop,
+    ScheduleTemplate,
+    Schedule,
+    BusAssignment,
+    Booking,
+    Passenger,
+]
+
+
+# plates are "T<seed>-<company>-<bus>" and must fit Bus.plate_number
+MAX_SEED = 10**11 - 1
+
+
+def seed_marker(seed):
+    return f"BENCH-{seed}"
+
+
+def is_seeded(seed):
+    return BusCompany.objects.filter(license_number=seed_marker(seed)).exists()
+
+
+def _add_minutes(value, minutes):
+    return (datetime.combine(datetime.min, value) + timedelta(minutes=minutes)).time()
+
+
+def _copy_value(value):
+    """Text format of COPY: tab separated, backslash escapes, \\N for NULL"""
+    if value is None:
+        return r"\N"
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+
+
+class Seeder:
+    """
+    Generates the dataset and writes it in chunks of `chunk_size` rows. `use_copy`
+    defaults to COPY on PostgreSQL and bulk_create elsewhere. `progress` is called with
+    the running counts after every flush.
+    """
+
+    def __init__(self, seed=1, chunk_size=5000, use_copy=None, progress=None):
+        self.seed = seed
+        self.chunk_size = chunk_size
+        self.use_copy = connection.vendor == "postgresql" if use_copy is None else use_copy
+        self.progress = progress
+        self.rng = random.Random(seed)
+        self.faker = Faker()
+        self.faker.seed_instance(seed)
+
+        self.counts = Counter()
+        self.elapsed = 0.0
+        self._pending = {model: [] for model in SEEDED_MODELS}
+        self._pending_rows = 0
+        self._fields = {
+            model: [field for field in model._meta.concrete_fields]
+            for model in SEEDED_MODELS
+        }
+        self._next_id = {}
+
+    # ids
+
+    def _reserve_ids(self):
+        for model in SEEDED_MODELS:
+            current = model.objects.aggregate(max_id=Max("pk"))["max_id"] or 0
+            self._next_id[model] = current + 1
+
+    def _new_id(self, model):
+        pk = self._next_id[model]
+        self._next_id[model] += 1
+        return pk
+
+    # writing
+
+    def add(self, model, **values):
+        """Queue one row; returns its primary key"""
+        values.setdefault("id", self._new_id(model))
+        self._pending[model].append(values)
+        self._pending_rows += 1
+        if self._pending_rows >= self.chunk_size:
+            self.flush()
+        return values["id"]
+
+    def flush(self):
+        if not self._pending_rows:
+            return
+        start = time.perf_counter()
+        with transaction.atomic():
+            for model in SEEDED_MODELS:
+                rows = self._pending[model]
+                if not rows:
+                    continue
+                if self.use_copy:
+                    self._copy(model, rows)
+                else:
+                    model.objects.bulk_create(
+                        [model(**row) for row in rows], batch_size=self.chunk_size
+                    )
+                self.counts[model.__name__] += len(rows)
+                self._pending[model] = []
+        self._pending_rows = 0
+        self.elapsed += time.perf_counter() - start
+        if self.progress:
+            self.progress(self)
+
+    def _copy(self, model, rows):
+        fields = self._fields[model]
+        now = timezone.now()
+        # COPY skips model defaults, fill them in like bulk_create would
+        defaults = [
+            now if getattr(field, "auto_now_add", False) else field.get_default()
+            for field in fields
+        ]
+        buffer = io.StringIO()
+        for row in rows:
+            buffer.write(
+                "\t".join(
+                    _copy_value(row.get(field.attname, default))
+                    for field, default in zip(fields, defaults)
+                )
+            )
+            buffer.write("\n")
+        buffer.seek(0)
+
+        columns = ", ".join(connection.ops.quote_name(field.column) for field in fields)
+        sql = f"COPY {connection.ops.quote_name(model._meta.db_table)} ({columns}) FROM STDIN"
+        with connection.cursor() as cursor:
+            raw = cursor.cursor
+            if hasattr(raw, "copy_expert"):  # psycopg2
+                raw.copy_expert(sql, buffer)
+            else:  # psycopg 3
+                with raw.copy(sql) as copy:
+                    copy.write(buffer.read())
+
+    def _reset_sequences(self):
+        # ids were assigned explicitly, move the sequences past them
+        statements = connection.ops.sequence_reset_sql(no_style(), SEEDED_MODELS)
+        if statements:
+            with connection.cursor() as cursor:
+                for statement in statements:
+                    cursor.execute(statement)
+
+    # generation
+
+    def city_names(self, routes):
+        """Enough distinct place names to form `routes` origin/destination pairs"""
+        needed = math.ceil((1 + math.sqrt(1 + 4 * routes)) / 2)
+        names = list(CITIES)
+        while len(names) < needed:
+            name = self.faker.unique.city()
+            if name not in names:
+                names.append(name)
+        return names
+
+    def seed_network(self, routes, companies, buses_per_company, templates_per_route):
+        rng = self.rng
+        marker = seed_marker(self.seed)
+
+        buses = []
+        for c in range(companies):
+            company_id = self.add(
+                BusCompany,
+                name=f"{self.faker.last_name()} Coach {self.seed}-{c}",
+                # the first company marks the seed as seeded
+                license_number=marker if c == 0 else f"{marker}-{c}",
+                contact_phone=f"2557{rng.randrange(10**8):08d}",
+            )
+            for b in range(buses_per_company):
+                total_seats = rng.choice(SEAT_LAYOUTS)
+                bus_id = self.add(
+                    Bus,
+                    company_id=company_id,
+                    # the full seed: plates are unique across seeded datasets
+                    plate_number=f"T{self.seed}-{c:03d}-{b:03d}",
+                    bus_type=rng.choice(BUS_TYPES),
+                    total_seats=total_seats,
+                    amenity_flags=sum(
+                        flag for flag in AMENITY_FLAGS.values() if rng.random() < 0.5
+                    ),
+                    is_active=True,
+                )
+                buses.append((bus_id, total_seats))
+
+        cities = self.city_names(routes)
+        pairs = rng.sample([(a, b) for a in cities for b in cities if a != b], routes)
+
+        templates = []
+        for origin, destination in pairs:
+            duration = rng.randint(3, 18) * 60
+            route_id = self.add(
+                Route,
+                origin=origin,
+                destination=destination,
+                distance_km=rng.randint(120, 1200),
+                estimated_duration_minutes=duration,
+            )
+            waypoints = [origin, *rng.sample(cities, 2), destination]
+            step = duration // (len(waypoints) - 1)
+            for order, name in enumerate(waypoints):
+                dwell = 10 if 0 < order < len(waypoints) - 1 else 0
+                self.add(
+                    RouteStop,
+                    route_id=route_id,
+                    stop_name=name,
+                    stop_order=order,
+                    arrival_offset_min=order * step,
+                    departure_offset_min=order * step + dwell,
+                )
+            for hour in sorted(rng.sample(DEPARTURE_HOURS, templates_per_route)):
+                departure = dt_time(hour)
+                base_price = Decimal(rng.randint(20, 90) * 1000)
+                arrival = _add_minutes(departure, duration)
+                template_id = self.add(
+                    ScheduleTemplate,
+                    route_id=route_id,
+                    departure_time=departure,
+                    arrival_time=arrival,
+                    base_price=base_price,
+                    is_active=True,
+                )
+                templates.append(
+                    (template_id, departure, arrival, base_price, origin, destination)
+                )
+        return buses, templates
+
+    def seed_day(self, travel_date, buses, templates, occupancy):
+        rng = self.rng
+        for template_id, departure, arrival, price, origin, destination in templates:
+            assignments = []
+            for bus_id, total_seats in rng.sample(buses, rng.randint(1, 2)):
+                taken = rng.sample(
+                    range(1, total_seats + 1),
+                    min(total_seats, int(total_seats * occupancy * 2 * rng.random())),
+                )
+                paid = {seat for seat in taken if rng.random() < 0.7}
+                assignments.append((bus_id, total_seats, taken, paid))
+
+            booked = sum(len(taken) for _, _, taken, _ in assignments)
+            paid_count = sum(len(paid) for _, _, _, paid in assignments)
+            schedule_id = self.add(
+                Schedule,
+                template_id=template_id,
+                travel_date=travel_date,
+                departure_time=departure,
+                arrival_time=arrival,
+                price=price,
+                status="ACTIVE",
+                held_seats=booked - paid_count,
+                paid_seats=paid_count,
+                booked_seats=booked,
+            )
+
+            for bus_id, total_seats, taken, paid in assignments:
+                assignment_id = self.add(
+                    BusAssignment,
+                    schedule_id=schedule_id,
+                    bus_id=bus_id,
+                    available_seats=total_seats - len(taken),
+                    status="ACTIVE",
+                    held_seats=len(taken) - len(paid),
+                    paid_seats=len(paid),
+                    booked_seats=len(taken),
+                )
+                for seat in taken:
+                    booking_id = self.add(
+                        Booking,
+                        schedule_id=schedule_id,
+                        bus_assignment_id=assignment_id,
+                        seat_number=seat,
+                        price_paid=price,
+                        is_paid=seat in paid,
+                        travel_date=travel_date,
+                    )
+                    self.add_passenger(booking_id, travel_date, origin, destination)
+
+    def add_passenger(self, booking_id, travel_date, origin, destination):
+        rng = self.rng
+        first, last = rng.choice(self.first_names), rng.choice(self.last_names)
+        self.add(
+            Passenger,
+            booking_id=booking_id,
+            first_name=first,
+            last_name=last,
+            email=f"{first}.{last}.{booking_id}@example.com".lower(),
+            phone=f"2557{rng.randrange(10**8):08d}",
+            age=rng.randint(1, 90),
+            gender=rng.choice("MF"),
+            nationality="Tanzanian",
+            boarding_point=origin,
+            dropping_point=destination,
+            travel_date=travel_date,
+        )
+
+    def run(
+        self,
+        routes=30,
+        days=14,
+        companies=5,
+        buses_per_company=12,
+        templates_per_route=2,
+        occupancy=0.3,
+        start=None,
+    ):
+        start = start or timezone.localdate()
+        # Faker is slow per call, draw names once from a fixed pool
+        self.first_names = [self.faker.first_name() for _ in range(200)]
+        self.last_names = [self.faker.last_name() for _ in range(200)]
+
+        # monthly partitions for the whole range, not the default partition
+        ensure_partitions(months_ahead=days // 28 + 1, today=start)
+        self._reserve_ids()
+
+        buses, templates = self.seed_network(
+            routes, companies, buses_per_company, templates_per_route
+        )
+        for day in range(days):
+            self.seed_day(start + timedelta(days=day), buses, templates, occupancy)
+        self.flush()
+
+        if connection.vendor == "postgresql":
+            self._reset_sequences()
+
+        # rows were written without signals: refresh the catalog snapshot and cache
+        catalog.bump_version()
+        catalog.reset_catalog()
+        for model in (BusCompany, Bus, Route, RouteStop, ScheduleTemplate):
+            invalidate(namespace_for(model))
+        return dict(self.counts)
+
+
+def seed_dataset(seed=1, chunk_size=5000, use_copy=None, progress=None, **options):
+    """
+    Seed the dataset for `seed` (see Seeder.run for the options) and return the number
+    of rows created per model, or None if `seed` was already seeded.
+    """
+    if is_seeded(seed):
+        return None
+    seeder = Seeder(seed=seed, chunk_size=chunk_size, use_copy=use_copy, progress=progress)
+    return seeder.run(**options)
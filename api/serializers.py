@@ -10,9 +10,38 @@ from .models import (
     RouteStop,
     ScheduleTemplate,
     Passenger,
+    AMENITY_FLAGS,
+    amenities_to_flags,
+    flags_to_amenities,
 )
 
 
+class AmenitiesField(serializers.Field):
+    """Exposes Bus.amenity_flags as a list of amenity names, e.g. ["AC", "WIFI"]"""
+
+    default_error_messages = {
+        "invalid": "Expected a list of amenities.",
+        "invalid_choice": "{input} is not a valid amenity. Choices are {choices}.",
+    }
+
+    def to_representation(self, value):
+        return flags_to_amenities(value)
+
+    def to_internal_value(self, data):
+        if isinstance(data, str):
+            data = [item for item in data.split(",") if item.strip()]
+        if not isinstance(data, (list, tuple)):
+            self.fail("invalid")
+
+        names = [str(item).strip().upper() for item in data]
+        for name in names:
+            if name not in AMENITY_FLAGS:
+                self.fail(
+                    "invalid_choice", input=name, choices=", ".join(AMENITY_FLAGS)
+                )
+        return amenities_to_flags(names)
+
+
 class BusCompanySerializer(serializers.ModelSerializer):
     class Meta:
         model = BusCompany
@@ -28,6 +57,8 @@ class BusCompanySerializer(serializers.ModelSerializer):
 
 
 class BusSerializer(serializers.ModelSerializer):
+    amenities = AmenitiesField(source="amenity_flags", required=False)
+
     class Meta:
         model = Bus
         fields = [
@@ -81,9 +112,7 @@ class ScheduleTemplateSerializer(serializers.ModelSerializer):
 
 
 class ScheduleSerializer(serializers.ModelSerializer):
-    route = serializers.CharField(source="template.route.name", read_only=True)
-    departure_time = serializers.SerializerMethodField()
-    arrival_time = serializers.SerializerMethodField()
+    route = serializers.CharField(source="template.route.__str__", read_only=True)
 
     class Meta:
         model = Schedule
@@ -119,8 +148,8 @@ class BusAssignmentSerializer(serializers.ModelSerializer):
     bus_type = serializers.CharField(source="bus.bus_type", read_only=True)
     company_name = serializers.CharField(source="bus.company.name", read_only=True)
     total_seats = serializers.IntegerField(source="bus.total_seats", read_only=True)
-    amenities = serializers.CharField(source="bus.amenities", read_only=True)
-    available_seats = serializers.SerializerMethodField()
+    amenities = AmenitiesField(source="bus.amenity_flags", read_only=True)
+    available_seats = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = BusAssignment
@@ -135,15 +164,6 @@ class BusAssignmentSerializer(serializers.ModelSerializer):
             "status",
         ]
 
-    def get_available_seats(self, obj):
-        """Calculate available seats for this specific bus assignment"""
-        booked = Booking.objects.filter(
-            schedule=obj.schedule,
-            # You might need to add a bus field to Booking model
-            # or filter by seat numbers assigned to this bus
-        ).count()
-        return obj.available_seats  # Or: obj.bus.total_seats - booked
-
 
 class ScheduleSearchSerializer(serializers.ModelSerializer):
     buses = BusAssignmentSerializer(source="bus_assignments", many=True, read_only=True)
@@ -204,6 +224,17 @@ class SearchRouteSerializer(serializers.Serializer):
     destination = serializers.CharField(required=True)
     date = serializers.DateField(required=True, input_formats=["%d-%m-%Y"])
 
+    # optional filters, all applied in SQL
+    amenities = AmenitiesField(required=False)
+    bus_type = serializers.CharField(required=False, allow_blank=True)
+    company = serializers.IntegerField(required=False, min_value=1)
+    min_price = serializers.DecimalField(
+        max_digits=10, decimal_places=2, required=False, min_value=0
+    )
+    max_price = serializers.DecimalField(
+        max_digits=10, decimal_places=2, required=False, min_value=0
+    )
+
     def validate_date(self, value):
         from django.utils import timezone
 
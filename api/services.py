@@ -1,9 +1,99 @@
 # services.py
+import time
+from dataclasses import dataclass
+
 from django.db import transaction, IntegrityError
 from django.core.exceptions import ValidationError
+from django.db.models import Count, Exists, F, OuterRef, Prefetch, Q
 from decimal import Decimal
 
-from .models import Booking, Schedule, PromoCode, Bus
+from .catalog import get_catalog
+from .metrics import SEAT_LOCK_WAIT
+from .models import Booking, BusAssignment, Passenger, Schedule, PromoCode, Bus
+
+
+def matching_buses(amenities=0, bus_type=None, company=None):
+    """
+    Assignments of active buses matching the search filters. `amenities` is a bit mask
+    (see AMENITY_FLAGS), all requested amenities must be present.
+    """
+    buses = BusAssignment.objects.filter(bus__is_active=True)
+    if amenities:
+        buses = buses.alias(
+            matched_amenities=F("bus__amenity_flags").bitand(amenities)
+        ).filter(matched_amenities=amenities)
+    if bus_type:
+        buses = buses.filter(bus__bus_type__iexact=bus_type)
+    if company:
+        buses = buses.filter(bus__company_id=company)
+    return buses
+
+
+@dataclass(frozen=True)
+class ScheduleSearch:
+    """Result of search_schedules(), the buses are the matching_buses() it filtered on"""
+
+    schedules: object  # Schedule queryset, matching buses prefetched
+    buses: object  # BusAssignment queryset
+
+
+def search_schedules(
+    origin,
+    destination,
+    travel_date,
+    amenities=0,
+    bus_type=None,
+    company=None,
+    min_price=None,
+    max_price=None,
+):
+    """
+    Active schedules between origin and destination on a date having at least one
+    active bus that matches the filters (see matching_buses). Only the matching buses
+    are prefetched. Routes are matched against the in-process catalog snapshot.
+    Returns a ScheduleSearch.
+    """
+    template_ids = get_catalog().active_template_ids(origin, destination)
+    buses = matching_buses(amenities, bus_type, company)
+
+    schedules = Schedule.objects.filter(
+        Exists(buses.filter(schedule=OuterRef("pk"))),
+        template_id__in=template_ids,
+        travel_date=travel_date,
+        status="ACTIVE",
+    )
+    if min_price is not None:
+        schedules = schedules.filter(price__gte=min_price)
+    if max_price is not None:
+        schedules = schedules.filter(price__lte=max_price)
+
+    schedules = (
+        schedules.select_related("template__route")
+        .prefetch_related(
+            Prefetch(
+                "bus_assignments",
+                queryset=buses.select_related("bus__company").order_by("id"),
+            )
+        )
+        .order_by("departure_time", "id")
+    )
+    return ScheduleSearch(schedules, buses)
+
+
+def _adjust_seat_counters(bus_assignment_id, schedule_id, held=0, paid=0):
+    """Apply held/paid deltas to the assignment and schedule counters in the current transaction"""
+    booked = held + paid
+    BusAssignment.objects.filter(pk=bus_assignment_id).update(
+        held_seats=F("held_seats") + held,
+        paid_seats=F("paid_seats") + paid,
+        booked_seats=F("booked_seats") + booked,
+        available_seats=F("available_seats") - booked,
+    )
+    Schedule.objects.filter(pk=schedule_id).update(
+        held_seats=F("held_seats") + held,
+        paid_seats=F("paid_seats") + paid,
+        booked_seats=F("booked_seats") + booked,
+    )
 
 
 @transaction.atomic
@@ -12,6 +102,21 @@ def book_seat(user, schedule, bus_assignment, seat_number, price):
     Atomically book a seat on a specific bus assignment
     No need to pass guest_email/guest_phone - they'll be in Passenger model
     """
+    # Lock the assignment so concurrent bookings on the same bus are serialized
+    lock_started = time.perf_counter()
+    counters = (
+        BusAssignment.objects.select_for_update()
+        .values("booked_seats", "available_seats")
+        .get(pk=bus_assignment.pk)
+    )
+    SEAT_LOCK_WAIT.observe(time.perf_counter() - lock_started)
+
+    if (
+        counters["available_seats"] <= 0
+        or counters["booked_seats"] >= bus_assignment.bus.total_seats
+    ):
+        raise ValidationError("This bus is fully booked")
+
     # Check if seat is already booked
     if Booking.objects.filter(
         bus_assignment=bus_assignment, seat_number=seat_number
@@ -20,34 +125,161 @@ def book_seat(user, schedule, bus_assignment, seat_number, price):
             f"Seat {seat_number} is already booked on bus {bus_assignment.bus.plate_number}"
         )
 
-    # Check if bus has available seats
-    booked_count = Booking.objects.filter(
-        bus_assignment=bus_assignment, is_paid=True
-    ).count()
+    # Create the booking
+    try:
+        with transaction.atomic():
+            booking = Booking.objects.create(
+                user=user,  # Can be None for guest bookings
+                schedule=schedule,
+                bus_assignment=bus_assignment,
+                seat_number=seat_number,
+                price_paid=price,
+                is_paid=False,
+            )
+    except IntegrityError:
+        raise ValidationError(
+            f"Seat {seat_number} is already booked on bus {bus_assignment.bus.plate_number}"
+        )
 
-    if booked_count >= bus_assignment.bus.total_seats:
-        raise ValidationError("This bus is fully booked")
+    # The seat is held until the booking is paid
+    _adjust_seat_counters(bus_assignment.pk, schedule.pk, held=1)
+    bus_assignment.available_seats = counters["available_seats"] - 1
+    bus_assignment.booked_seats = counters["booked_seats"] + 1
 
-    if bus_assignment.available_seats <= 0:
-        raise ValidationError("No seats available on this bus")
+    return booking
 
-    # Create the booking
-    booking = Booking.objects.create(
-        user=user,  # Can be None for guest bookings
-        schedule=schedule,
-        bus_assignment=bus_assignment,
-        seat_number=seat_number,
-        price_paid=price,
-        is_paid=False,
+
+def _seat_delta(is_paid, seats):
+    return {"paid": seats} if is_paid else {"held": seats}
+
+
+@transaction.atomic
+def save_booking(booking):
+    """
+    Save a booking edited outside book_seat (e.g. in the admin) and move its seat
+    between the counters of its previous and new bus assignment and paid state
+    """
+    previous = None
+    if booking.pk:
+        previous = (
+            Booking.objects.select_for_update()
+            .filter(pk=booking.pk)
+            .values("bus_assignment_id", "schedule_id", "is_paid")
+            .first()
+        )
+    moved = previous is not None and previous["schedule_id"] != booking.schedule_id
+    if moved:
+        booking.travel_date = booking.schedule.travel_date
+    booking.save()
+    if moved:
+        Passenger.objects.filter(booking=booking).update(travel_date=booking.travel_date)
+
+    current = {
+        "bus_assignment_id": booking.bus_assignment_id,
+        "schedule_id": booking.schedule_id,
+        "is_paid": booking.is_paid,
+    }
+    if previous == current:
+        return booking
+    if previous is not None:
+        _adjust_seat_counters(
+            previous["bus_assignment_id"],
+            previous["schedule_id"],
+            **_seat_delta(previous["is_paid"], -1),
+        )
+    _adjust_seat_counters(
+        booking.bus_assignment_id, booking.schedule_id, **_seat_delta(booking.is_paid, 1)
     )
+    return booking
 
-    # Decrement available seats
-    bus_assignment.available_seats -= 1
-    bus_assignment.save()
 
+@transaction.atomic
+def mark_booking_paid(booking):
+    """Mark a held booking as paid and move its seat from held to paid"""
+    updated = Booking.objects.filter(pk=booking.pk, is_paid=False).update(is_paid=True)
+    if updated:
+        _adjust_seat_counters(
+            booking.bus_assignment_id, booking.schedule_id, held=-1, paid=1
+        )
+    booking.is_paid = True
     return booking
 
 
+@transaction.atomic
+def cancel_booking(booking):
+    """Delete a booking (and its passenger) and release the seat"""
+    locked = Booking.objects.select_for_update().filter(pk=booking.pk).first()
+    if locked is None:
+        return
+
+    locked.delete()
+    _adjust_seat_counters(
+        locked.bus_assignment_id, locked.schedule_id, **_seat_delta(locked.is_paid, -1)
+    )
+
+
+def reconcile_seat_counters(fix=False, batch_size=1000):
+    """
+    Recount bookings per bus assignment and schedule and compare with the stored counters.
+    Drifted rows are repaired with bulk_update when fix=True.
+    Returns (drifted assignments, drifted schedules).
+    """
+    counts = {
+        "held": Count("id", filter=Q(is_paid=False)),
+        "paid": Count("id", filter=Q(is_paid=True)),
+    }
+
+    def recount(queryset, group_by):
+        fields = ["held_seats", "paid_seats", "booked_seats"]
+        if queryset.model is BusAssignment:
+            fields.append("available_seats")
+        drifted = 0
+        last_id = 0
+        while True:
+            rows = list(queryset.filter(id__gt=last_id).order_by("id")[:batch_size])
+            if not rows:
+                return drifted
+            last_id = rows[-1].pk
+
+            actual = {
+                row[group_by]: row
+                for row in Booking.objects.filter(
+                    **{f"{group_by}__in": [obj.pk for obj in rows]}
+                )
+                .values(group_by)
+                .annotate(**counts)
+                .order_by()
+            }
+
+            changed = []
+            for obj in rows:
+                row = actual.get(obj.pk, {"held": 0, "paid": 0})
+                expected = {
+                    "held_seats": row["held"],
+                    "paid_seats": row["paid"],
+                    "booked_seats": row["held"] + row["paid"],
+                }
+                if isinstance(obj, BusAssignment):
+                    expected["available_seats"] = max(
+                        obj.bus.total_seats - expected["booked_seats"], 0
+                    )
+                if any(getattr(obj, field) != value for field, value in expected.items()):
+                    for field, value in expected.items():
+                        setattr(obj, field, value)
+                    changed.append(obj)
+
+            drifted += len(changed)
+            if fix and changed:
+                with transaction.atomic():
+                    queryset.model.objects.bulk_update(changed, fields)
+
+    assignments = recount(
+        BusAssignment.objects.select_related("bus"), "bus_assignment_id"
+    )
+    schedules = recount(Schedule.objects.all(), "schedule_id")
+    return assignments, schedules
+
+
 # promocode service
 @transaction.atomic
 def apply_promo(schedule_price: Decimal, promo: PromoCode, increment_usage: bool = False) -> Decimal:
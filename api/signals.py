@@ -0,0 +1,32 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import catalog
+from .cache import invalidate, namespace_for
+from .models import Bus, BusCompany, Route, RouteStop, ScheduleTemplate
+
+CACHED_CATALOG_MODELS = [BusCompany, Bus, Route, RouteStop, ScheduleTemplate]
+
+# models captured by the in-process route catalog snapshot
+ROUTE_NETWORK_MODELS = [Route, RouteStop, ScheduleTemplate]
+
+
+@receiver(post_save)
+@receiver(post_delete)
+def invalidate_catalog_cache(sender, **kwargs):
+    if sender in CACHED_CATALOG_MODELS:
+        # after the commit: a read in between would cache the old rows under the new version
+        transaction.on_commit(partial(invalidate, namespace_for(sender)))
+
+
+@receiver(post_save)
+@receiver(post_delete)
+def bump_catalog_version(sender, **kwargs):
+    if sender in ROUTE_NETWORK_MODELS:
+        catalog.bump_version()
+        # this worker reloads once the change is committed, the others pick the new
+        # version up on their next check
+        transaction.on_commit(catalog.reset_catalog)
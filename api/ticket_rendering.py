@@ -0,0 +1,79 @@
+"""
+Drawing of e-tickets, run in the worker processes of api.tickets.
+
+Only Pillow and qrcode are imported here so the processes start quickly: the ticket
+data arrives as a dict of strings and the PNG and PDF come back as bytes.
+"""
+
+import io
+
+import qrcode
+from PIL import Image, ImageDraw, ImageFont
+
+WIDTH, HEIGHT = 1000, 440
+MARGIN = 40
+HEADER_HEIGHT = 90
+QR_SIZE = 280
+ACCENT = (24, 78, 162)
+MUTED = (110, 110, 110)
+
+# label, key of the ticket data; drawn in two columns left of the QR code
+FIELDS = [
+    ("Passenger", "passenger"),
+    ("Seat", "seat"),
+    ("From", "origin"),
+    ("To", "destination"),
+    ("Date", "date"),
+    ("Price", "price"),
+    ("Departure", "departure"),
+    ("Arrival", "arrival"),
+    ("Boarding", "boarding_point"),
+    ("Dropping", "dropping_point"),
+]
+
+
+def _font(size):
+    # Pillow's bundled font, scalable when Pillow is built with FreeType
+    return ImageFont.load_default(size=size)
+
+
+def _qr_image(code):
+    qr = qrcode.QRCode(error_correction=qrcode.constants.ERROR_CORRECT_M, border=0)
+    qr.add_data(code)
+    qr.make(fit=True)
+    image = qr.make_image(fill_color="black", back_color="white").get_image()
+    return image.convert("RGB").resize((QR_SIZE, QR_SIZE), Image.NEAREST)
+
+
+def draw_ticket(ticket):
+    image = Image.new("RGB", (WIDTH, HEIGHT), "white")
+    draw = ImageDraw.Draw(image)
+
+    draw.rectangle((0, 0, WIDTH, HEADER_HEIGHT), fill=ACCENT)
+    draw.text((MARGIN, 22), ticket["company"], font=_font(30), fill="white")
+    draw.text((MARGIN, 58), f"Bus {ticket['bus_plate']}", font=_font(18), fill="white")
+    draw.text(
+        (WIDTH - MARGIN, 45), ticket["reference"], font=_font(26), fill="white", anchor="rm"
+    )
+
+    label_font, value_font = _font(15), _font(22)
+    column_width = (WIDTH - 3 * MARGIN - QR_SIZE) // 2
+    for index, (label, key) in enumerate(FIELDS):
+        x = MARGIN + (index % 2) * column_width
+        y = HEADER_HEIGHT + 25 + (index // 2) * 62
+        draw.text((x, y), label.upper(), font=label_font, fill=MUTED)
+        draw.text((x, y + 20), ticket[key], font=value_font, fill="black")
+
+    image.paste(_qr_image(ticket["code"]), (WIDTH - MARGIN - QR_SIZE, HEADER_HEIGHT + 35))
+    return image
+
+
+def render_ticket(ticket):
+    """{"png": bytes, "pdf": bytes} of the ticket"""
+    image = draw_ticket(ticket)
+    rendered = {}
+    for kind, options in (("png", {"optimize": True}), ("pdf", {"resolution": 150})):
+        buffer = io.BytesIO()
+        image.save(buffer, kind.upper(), **options)
+        rendered[kind] = buffer.getvalue()
+    return rendered
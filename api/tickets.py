@@ -0,0 +1,214 @@
+"""
+E-tickets with a QR code, rendered off the request path.
+
+After a booking commits, CreateBookingView hands the ticket data to a process pool
+(TICKET_RENDER_WORKERS processes per web worker, started on first use) and returns
+right away; drawing a ticket takes around a hundred milliseconds of CPU
+(api/ticket_rendering.py). The PNG and PDF are stored in TICKETS_DIR under the
+booking id and a digest of the ticket data, so edited bookings get new files and
+every worker on the host reuses them.
+
+Tickets are downloaded from ticket_url(), signed with the SECRET_KEY and a timestamp
+so guest bookings need no login; links expire after TICKET_LINK_MAX_AGE seconds. The QR
+code carries a separately signed booking reference without expiry, which a scanner can
+check with booking_from_code(). A ticket that isn't stored yet (the render is still
+running, or the file was removed) is rendered by the download request through the
+pool, waiting at most TICKET_RENDER_TIMEOUT seconds; after that load_ticket() raises
+TicketNotReady and the render is stored for the client's retry.
+"""
+
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+
+from django.conf import settings
+from django.core import signing
+from django.urls import reverse
+
+from .ticket_rendering import render_ticket
+
+logger = logging.getLogger(__name__)
+
+TICKET_KINDS = {"png": "image/png", "pdf": "application/pdf"}
+SIGNING_SALT = "api.tickets"
+CODE_SIGNING_SALT = "api.tickets.code"
+# seconds a client waits before retrying a download that timed out
+RETRY_AFTER_SECONDS = 5
+
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+
+
+class TicketNotReady(Exception):
+    """The ticket couldn't be rendered in time, the download should be retried"""
+
+
+def ticket_token(booking_id):
+    return signing.TimestampSigner(salt=SIGNING_SALT).sign(str(booking_id))
+
+
+def booking_from_token(token):
+    """
+    The booking id of a download token, None when the signature doesn't match or
+    the token is older than TICKET_LINK_MAX_AGE
+    """
+    try:
+        return int(
+            signing.TimestampSigner(salt=SIGNING_SALT).unsign(
+                token, max_age=settings.TICKET_LINK_MAX_AGE
+            )
+        )
+    except (signing.BadSignature, ValueError):
+        return None
+
+
+def ticket_code(booking_id):
+    """The QR code content, stable so stored tickets stay valid"""
+    return signing.Signer(salt=CODE_SIGNING_SALT).sign(str(booking_id))
+
+
+def booking_from_code(code):
+    """The booking id of a scanned QR code, None when the signature doesn't match"""
+    try:
+        return int(signing.Signer(salt=CODE_SIGNING_SALT).unsign(code))
+    except (signing.BadSignature, ValueError):
+        return None
+
+
+def ticket_url(booking_id, kind):
+    return reverse("booking-ticket", kwargs={"token": ticket_token(booking_id), "kind": kind})
+
+
+def ticket_data(booking, passenger, schedule, route, bus):
+    """The strings printed on the ticket; `route` may be a catalog RouteEntry"""
+    return {
+        "reference": f"BK{booking.pk:08d}",
+        "company": bus.company.name,
+        "bus_plate": bus.plate_number,
+        "passenger": f"{passenger.first_name} {passenger.last_name}",
+        "seat": str(booking.seat_number),
+        "origin": str(route.origin),
+        "destination": str(route.destination),
+        "date": schedule.travel_date.strftime("%d-%m-%Y"),
+        "departure": schedule.departure_time.strftime("%H:%M"),
+        "arrival": schedule.arrival_time.strftime("%H:%M"),
+        "boarding_point": passenger.boarding_point,
+        "dropping_point": passenger.dropping_point,
+        "price": f"{booking.price_paid:.2f}",
+        "code": ticket_code(booking.pk),
+    }
+
+
+def ticket_data_for(booking):
+    """ticket_data() of a booking loaded with select_related() (see views.ticket_download)"""
+    schedule = booking.schedule
+    return ticket_data(
+        booking,
+        booking.passenger,
+        schedule,
+        schedule.template.route,
+        booking.bus_assignment.bus,
+    )
+
+
+def tickets_dir():
+    return Path(settings.TICKETS_DIR)
+
+
+def ticket_path(booking_id, ticket, kind):
+    digest = hashlib.sha256(json.dumps(ticket, sort_keys=True).encode()).hexdigest()[:16]
+    return tickets_dir() / f"{booking_id}-{digest}.{kind}"
+
+
+def _executor_for_process():
+    global _executor, _executor_pid
+    with _executor_lock:
+        # a pool inherited through fork() belongs to the parent
+        if _executor is None or _executor_pid != os.getpid():
+            _executor = ProcessPoolExecutor(
+                max_workers=settings.TICKET_RENDER_WORKERS,
+                # fresh interpreters: forking a threaded web worker is unsafe
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+            _executor_pid = os.getpid()
+        return _executor
+
+
+def _discard_executor():
+    # after a render process died; renders still running in it may finish
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=False)
+
+
+def _submit(ticket):
+    try:
+        return _executor_for_process().submit(render_ticket, ticket)
+    except BrokenProcessPool:
+        _discard_executor()
+        return _executor_for_process().submit(render_ticket, ticket)
+
+
+def store_ticket(booking_id, ticket, rendered):
+    directory = tickets_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    for kind, content in rendered.items():
+        path = ticket_path(booking_id, ticket, kind)
+        # written aside and renamed so readers never see a partial file
+        fd, temporary = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, "wb") as file:
+            file.write(content)
+        os.replace(temporary, path)
+        # tickets of earlier versions of the booking
+        for stale in directory.glob(f"{booking_id}-*.{kind}"):
+            if stale != path:
+                stale.unlink(missing_ok=True)
+
+
+def _store_when_done(booking_id, ticket, future):
+    def stored(future):
+        try:
+            store_ticket(booking_id, ticket, future.result())
+        except Exception:
+            logger.exception("Rendering the ticket of booking %s failed", booking_id)
+
+    future.add_done_callback(stored)
+
+
+def render_in_background(booking_id, ticket):
+    # the booking is committed already; a missing ticket is rendered on download
+    try:
+        _store_when_done(booking_id, ticket, _submit(ticket))
+    except Exception:
+        logger.exception("Queueing the ticket of booking %s failed", booking_id)
+
+
+def load_ticket(booking_id, ticket, kind):
+    """The stored ticket, rendered now if it isn't stored yet (see TicketNotReady)"""
+    try:
+        return ticket_path(booking_id, ticket, kind).read_bytes()
+    except FileNotFoundError:
+        pass
+
+    future = _submit(ticket)
+    try:
+        rendered = future.result(timeout=settings.TICKET_RENDER_TIMEOUT)
+    except TimeoutError:
+        # don't hold the web worker longer, the retry finds the stored ticket
+        _store_when_done(booking_id, ticket, future)
+        raise TicketNotReady
+    except BrokenProcessPool:
+        _discard_executor()
+        raise TicketNotReady
+    store_ticket(booking_id, ticket, rendered)
+    return rendered[kind]
@@ -1,7 +1,12 @@
-from django.urls import path
-from .views import SearchRouteView, CreateBookingView
+from django.urls import path, re_path
+from .views import SearchRouteView, CreateBookingView, ticket_download
 
 urlpatterns = [
     path("search/", SearchRouteView.as_view()),
     path("bookings/", CreateBookingView.as_view()),
+    re_path(
+        r"^tickets/(?P<token>[\w:-]+)\.(?P<kind>png|pdf)$",
+        ticket_download,
+        name="booking-ticket",
+    ),
 ]
@@ -5,8 +5,11 @@ from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
 from django.db import transaction
 from django.core.exceptions import ValidationError
+from django.http import Http404, HttpResponse
+from django.views.decorators.http import require_GET
 from django.db.models import Count, Q
 from .models import (
+    Booking,
     BusAssignment,
     BusCompany,
     Bus,
@@ -24,54 +27,76 @@ from .serializers import (
     RouteStopSerializer,
     ScheduleTemplateSerializer,
     ScheduleSerializer,
-    ScheduleSearchSerializer,
     BookingCreateSerializer,
     SearchRouteSerializer,
     BookingCreateSerializer
 )
-from .services import apply_promo, book_seat
+from .cache import CachedCatalogMixin
+from .catalog import get_catalog
+from .metrics import BOOKINGS
+from .search_results import search_results
+from .services import apply_promo, book_seat, search_schedules
+from .tickets import (
+    RETRY_AFTER_SECONDS,
+    TICKET_KINDS,
+    TicketNotReady,
+    booking_from_token,
+    load_ticket,
+    render_in_background,
+    ticket_data,
+    ticket_data_for,
+    ticket_url,
+)
 from django.db.models import Count
 from django.utils import timezone
 from typing import cast, Any
+from core.streaming import StreamingListMixin
 
 
-class BusCompanyViewSet(ModelViewSet):
+class BusCompanyViewSet(CachedCatalogMixin, ModelViewSet):
     serializer_class = BusCompanySerializer
     queryset = BusCompany.objects.all()
     permission_classes = [IsAuthenticated]
 
 
-class BusViewSet(ModelViewSet):
+class BusViewSet(CachedCatalogMixin, ModelViewSet):
     serializer_class = BusSerializer
     queryset = Bus.objects.all()
     permission_classes = [IsAuthenticated]
 
 
-class RouteViewSet(ModelViewSet):
+class RouteViewSet(CachedCatalogMixin, ModelViewSet):
     serializer_class = RouteSerializer
     queryset = Route.objects.all()
+    replica_methods = ("GET", "HEAD")
+    stateless_auth_methods = ("GET", "HEAD")
     # permission_classes = [IsAuthenticated]
 
 
-class RouteStopViewSet(ModelViewSet):
+class RouteStopViewSet(CachedCatalogMixin, ModelViewSet):
     serializer_class = RouteStopSerializer
     queryset = RouteStop.objects.all()
     # permission_classes = [IsAuthenticated]
 
 
-class ScheduleTemplateViewSet(ModelViewSet):
+class ScheduleTemplateViewSet(CachedCatalogMixin, ModelViewSet):
     serializer_class = ScheduleTemplateSerializer
     queryset = ScheduleTemplate.objects.all()
     # permission_classes = [IsAuthenticated]
 
 
-class ScheduleViewSet(ModelViewSet):
+class ScheduleViewSet(StreamingListMixin, ModelViewSet):
     serializer_class = ScheduleSerializer
-    queryset = Schedule.objects.all()
+    queryset = Schedule.objects.select_related("template__route")
+    replica_methods = ("GET", "HEAD")
+    stateless_auth_methods = ("GET", "HEAD")
     # permission_classes = [IsAuthenticated]
 
 
 class SearchRouteView(APIView):
+    # search only reads, so it can be served by a read replica
+    replica_methods = ("POST",)
+    stateless_auth_methods = ("POST",)
 
     def post(self, request):
         serializer = SearchRouteSerializer(data=request.data)
@@ -83,11 +108,9 @@ class SearchRouteView(APIView):
         travel_date = validated_data["date"]
 
         # First check if route templates exist
-        templates_exist = ScheduleTemplate.objects.filter(
-            route__origin__icontains=origin,
-            route__destination__icontains=destination,
-            is_active=True,
-        ).exists()
+        templates_exist = bool(
+            get_catalog().active_template_ids(origin, destination)
+        )
 
         if not templates_exist:
             return Response(
@@ -100,23 +123,21 @@ class SearchRouteView(APIView):
             )
 
         # Fetch schedules
-        schedules = (
-            Schedule.objects.filter(
-                template__route__origin__icontains=origin,
-                template__route__destination__icontains=destination,
-                travel_date=travel_date,
-                status="ACTIVE",
-                bus_assignments__bus__is_active=True,
-            )
-            .select_related("template__route")
-            .prefetch_related("bus_assignments__bus")
-            .annotate(booked_seats=Count("booking", filter=Q(booking__is_paid=True)))
-            .order_by("departure_time")
-            .distinct()
+        search = search_schedules(
+            origin,
+            destination,
+            travel_date,
+            amenities=validated_data.get("amenities", 0),
+            bus_type=validated_data.get("bus_type"),
+            company=validated_data.get("company"),
+            min_price=validated_data.get("min_price"),
+            max_price=validated_data.get("max_price"),
         )
+        # same data as ScheduleSearchSerializer(search.schedules, many=True), see search_results.py
+        results = search_results(search.schedules, search.buses)
 
         # Check if no schedules found
-        if not schedules.exists():
+        if not results:
             return Response(
                 {
                     "success": False,
@@ -131,11 +152,10 @@ class SearchRouteView(APIView):
                 status=status.HTTP_404_NOT_FOUND,
             )
 
-        response_serializer = ScheduleSearchSerializer(schedules, many=True)
         return Response(
             {
                 "success": True,
-                "results": response_serializer.data,
+                "results": results,
             },
             status=status.HTTP_200_OK,
         )
@@ -144,8 +164,20 @@ class SearchRouteView(APIView):
 class CreateBookingView(APIView):
     # permission_classes = [IsAuthenticated]
 
-    @transaction.atomic
     def post(self, request):
+        try:
+            response = self.create_booking(request)
+        except Exception:
+            BOOKINGS.inc(outcome="failure")
+            raise
+        outcome = getattr(response, "booking_outcome", None)
+        if outcome is None:
+            outcome = "success" if response.status_code == 201 else "failure"
+        BOOKINGS.inc(outcome=outcome)
+        return response
+
+    @transaction.atomic
+    def create_booking(self, request):
         serializer = BookingCreateSerializer(data=request.data)
         if not serializer.is_valid():
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -160,9 +192,7 @@ class CreateBookingView(APIView):
 
         # Validate schedule
         try:
-            schedule = Schedule.objects.select_related("template").get(
-                id=schedule_id, status="ACTIVE"
-            )
+            schedule = Schedule.objects.get(id=schedule_id, status="ACTIVE")
         except Schedule.DoesNotExist:
             return Response(
                 {"detail": "Schedule not found or inactive"},
@@ -172,7 +202,7 @@ class CreateBookingView(APIView):
         # Validate bus assignment
         try:
             bus_assignment = BusAssignment.objects.select_related(
-                "bus"
+                "bus__company"
             ).get(id=bus_assignment_id, schedule=schedule, status="ACTIVE")
         except BusAssignment.DoesNotExist:
             return Response(
@@ -220,23 +250,35 @@ class CreateBookingView(APIView):
                 price=final_price,
             )
         except ValidationError as e:
-            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+            response = Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+            # seat taken or bus full, lost to a concurrent booking
+            response.booking_outcome = "conflict"
+            return response
 
         # Create passenger
-        Passenger.objects.create(booking=booking, **passenger_data)
+        passenger = Passenger.objects.create(booking=booking, **passenger_data)
+
+        route = get_catalog().route_for_template(schedule.template_id)
+        if route is None:
+            # template created after the current snapshot
+            route = schedule.template.route
 
         # Increment promo usage only after successful booking
         if promo:
             promo.current_uses += 1
             promo.save()
 
+        # rendered by a worker process once the booking is committed
+        ticket = ticket_data(booking, passenger, schedule, route, bus_assignment.bus)
+        transaction.on_commit(lambda: render_in_background(booking.pk, ticket))
+
         return Response(
             {
                 "detail": "Booking successful",
                 "booking_id": booking.pk,
                 "schedule": {
-                    "origin": str(schedule.template.route.origin),
-                    "destination": str(schedule.template.route.destination),
+                    "origin": str(route.origin),
+                    "destination": str(route.destination),
                     "date": schedule.travel_date.strftime("%d-%m-%Y"),
                     "departure_time": schedule.departure_time.strftime("%H:%M"),
                     "arrival_time": schedule.arrival_time.strftime("%H:%M"),
@@ -249,6 +291,39 @@ class CreateBookingView(APIView):
                 "price_paid": str(final_price),
                 "original_price": str(schedule.price),
                 "discount": str(schedule.price - final_price) if promo else "0.00",
+                "ticket": {kind: ticket_url(booking.pk, kind) for kind in TICKET_KINDS},
             },
             status=status.HTTP_201_CREATED,
         )
+
+
+@require_GET
+def ticket_download(request, token, kind):
+    """The e-ticket of a booking; the signed token stands in for a login"""
+    booking_id = booking_from_token(token)
+    if booking_id is None:
+        raise Http404("Unknown ticket")
+    try:
+        booking = Booking.objects.select_related(
+            "passenger", "schedule__template__route", "bus_assignment__bus__company"
+        ).get(pk=booking_id)
+    except Booking.DoesNotExist:
+        raise Http404("Unknown ticket")
+
+    ticket = ticket_data_for(booking)
+    try:
+        content = load_ticket(booking.pk, ticket, kind)
+    except TicketNotReady:
+        response = HttpResponse(
+            "The ticket is being prepared, please retry shortly.",
+            status=503,
+            content_type="text/plain",
+        )
+        response["Retry-After"] = str(RETRY_AFTER_SECONDS)
+        return response
+
+    response = HttpResponse(content, content_type=TICKET_KINDS[kind])
+    filename = f"ticket-{ticket['reference']}.{kind}"
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    response["Cache-Control"] = "private, no-cache"
+    return response
@@ -0,0 +1,95 @@
+"""
+Content negotiation and compressors for CompressionMiddleware.
+
+Brotli is used when the `brotli` package is installed and the client accepts it,
+gzip otherwise. Streamed content is compressed chunk by chunk, each chunk flushed so
+the client receives it without waiting for the end of the response.
+"""
+
+import zlib
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
+GZIP_LEVEL = 6
+# brotli's default quality (11) is meant for static assets; 5 compresses JSON
+# responses better than gzip level 6 at about the same speed
+BROTLI_QUALITY = 5
+
+# most preferred first
+ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def accepted_encodings(header):
+    """{coding: q} from an Accept-Encoding header"""
+    accepted = {}
+    for item in header.split(","):
+        coding, _, params = item.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[coding] = quality
+    return accepted
+
+
+def choose_encoding(header):
+    """The preferred supported coding of an Accept-Encoding header, or None"""
+    accepted = accepted_encodings(header)
+    best, best_quality = None, 0.0
+    for coding in ENCODINGS:
+        quality = accepted.get(coding, accepted.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = coding, quality
+    return best
+
+
+def compress(content, encoding):
+    if encoding == "br":
+        return brotli.compress(content, quality=BROTLI_QUALITY)
+    compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    return compressor.compress(content) + compressor.flush()
+
+
+class StreamCompressor:
+    def __init__(self, encoding):
+        if encoding == "br":
+            compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+            self._compress, self._flush = compressor.process, compressor.flush
+            self._finish = compressor.finish
+        else:
+            compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+            self._compress = compressor.compress
+            self._flush = lambda: compressor.flush(zlib.Z_SYNC_FLUSH)
+            self._finish = compressor.flush
+
+    def chunk(self, data):
+        return self._compress(data) + self._flush()
+
+    def finish(self):
+        return self._finish()
+
+
+def compress_stream(chunks, encoding):
+    compressor = StreamCompressor(encoding)
+    for data in chunks:
+        if data:
+            yield compressor.chunk(data)
+    yield compressor.finish()
+
+
+async def acompress_stream(chunks, encoding):
+    compressor = StreamCompressor(encoding)
+    async for data in chunks:
+        if data:
+            yield compressor.chunk(data)
+    yield compressor.finish()
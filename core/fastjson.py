@@ -0,0 +1,68 @@
+"""
+orjson backed JSON renderer and parser for DRF.
+
+Drop-in replacements for rest_framework's JSONRenderer and JSONParser, enabled through
+DEFAULT_RENDERER_CLASSES / DEFAULT_PARSER_CLASSES in REST_FRAMEWORK. Output matches
+DRF's compact JSON: values orjson doesn't serialize natively (Decimal, dates and times,
+lazy strings, querysets, ...) go through DRF's JSONEncoder.default, so a Decimal price
+still renders as a number and a UTC datetime still ends in "Z".
+
+Without orjson installed, for indented output (`Accept: application/json; indent=4`,
+the browsable API), with COMPACT_JSON/UNICODE_JSON/STRICT_JSON changed from their
+defaults, and for the data orjson rejects (integers beyond 64 bits, very deep nesting)
+the classes fall back to DRF's json module implementation.
+"""
+
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pure-Python fallback
+    orjson = None
+
+if orjson is not None:
+    # datetimes go through the DRF encoder, orjson's RFC 3339 format differs
+    DUMPS_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+
+
+class FastJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            orjson is None
+            or data is None
+            or self.ensure_ascii
+            or not self.compact
+            or not self.strict
+            or self.get_indent(accepted_media_type, renderer_context or {}) is not None
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(data, default=JSONEncoder().default, option=DUMPS_OPTIONS)
+        except orjson.JSONEncodeError:
+            # let the json module encode it or raise its usual error
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # escaped like JSONRenderer so the output stays a strict javascript subset
+        if b"\xe2\x80\xa8" in ret or b"\xe2\x80\xa9" in ret:
+            ret = ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(b"\xe2\x80\xa9", b"\\u2029")
+        return ret
+
+
+class FastJSONParser(JSONParser):
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = (parser_context or {}).get("encoding", "utf-8")
+        if orjson is None or not self.strict or encoding.lower().replace("-", "") != "utf8":
+            return super().parse(stream, media_type, parser_context)
+
+        # orjson rejects NaN and Infinity like the strict json parser;
+        # integers beyond 64 bits are read as floats
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError(f"JSON parse error - {exc}")
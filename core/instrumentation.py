@@ -0,0 +1,72 @@
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+
+from django.db import connections
+
+
+class QueryRecorder:
+    """execute_wrapper that counts queries and the time spent in the database"""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+
+
+@contextmanager
+def record_queries():
+    """Record queries on every configured database for the duration of the block"""
+    recorder = QueryRecorder()
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(recorder))
+        yield recorder
+
+
+# per-process aggregates keyed by endpoint ("POST api-search", "GET route-list", ...)
+_endpoint_stats = {}
+_stats_lock = threading.Lock()
+
+
+def record_request(endpoint, queries, db_time, total_time):
+    with _stats_lock:
+        stats = _endpoint_stats.setdefault(
+            endpoint,
+            {
+                "requests": 0,
+                "queries": 0,
+                "max_queries": 0,
+                "db_time": 0.0,
+                "total_time": 0.0,
+            },
+        )
+        stats["requests"] += 1
+        stats["queries"] += queries
+        stats["max_queries"] = max(stats["max_queries"], queries)
+        stats["db_time"] += db_time
+        stats["total_time"] += total_time
+
+
+def request_stats():
+    """Snapshot of the per-endpoint aggregates of this process"""
+    with _stats_lock:
+        return {endpoint: dict(stats) for endpoint, stats in _endpoint_stats.items()}
+
+
+def reset_request_stats():
+    with _stats_lock:
+        _endpoint_stats.clear()
+
+
+def endpoint_name(request):
+    match = getattr(request, "resolver_match", None)
+    name = match.view_name if match else "unresolved"
+    return f"{request.method} {name}"
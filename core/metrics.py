@@ -0,0 +1,334 @@
+"""
+Lightweight in-process metrics with a Prometheus text exposition.
+
+Every process keeps its counters, histograms and gauges in memory. When METRICS_DIR is
+set (required with several gunicorn workers) each process also writes a snapshot to
+METRICS_DIR/<pid>.json, at most every METRICS_FLUSH_INTERVAL seconds, and the metrics
+endpoint merges the snapshots of all processes: counters and histograms are summed,
+including those of workers that already exited so totals never go backwards; gauges
+are summed over the processes that are still alive. When gunicorn reaps a worker,
+fold_snapshot() adds its counters and histograms to METRICS_DIR/aggregate.json and
+removes its snapshot, so recycled workers don't leave a file each behind.
+"""
+
+import atexit
+import bisect
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# counters and histograms of exited processes, see fold_snapshot()
+AGGREGATE_FILE = "aggregate.json"
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = {}
+        self.lock = threading.RLock()
+        self._flushed_at = 0.0
+        self._timer = None
+
+    def register(self, metric):
+        with self.lock:
+            if metric.name in self.metrics:
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self.metrics[metric.name] = metric
+
+    def reset(self):
+        """Forget all values, e.g. in a freshly forked worker"""
+        with self.lock:
+            for metric in self.metrics.values():
+                metric.values = {}
+            self._flushed_at = 0.0
+            self._timer = None  # timer threads don't survive a fork
+
+    def snapshot(self):
+        """JSON-serializable state of this process"""
+        with self.lock:
+            return {name: metric.snapshot() for name, metric in self.metrics.items()}
+
+    # multi-process
+
+    def directory(self):
+        directory = getattr(settings, "METRICS_DIR", None)
+        return Path(directory) if directory else None
+
+    def flush(self):
+        directory = self.directory()
+        if directory is None:
+            return
+        self._flushed_at = time.monotonic()
+        directory.mkdir(parents=True, exist_ok=True)
+        path = directory / f"{os.getpid()}.json"
+        # written aside and renamed so readers never see a partial file
+        temporary = directory / f"{os.getpid()}-{threading.get_ident()}.tmp"
+        temporary.write_text(json.dumps(self.snapshot()))
+        os.replace(temporary, path)
+
+    def changed(self):
+        if self.directory() is None:
+            return
+        wait = self._flushed_at + settings.METRICS_FLUSH_INTERVAL - time.monotonic()
+        if wait <= 0:
+            self.flush()
+            return
+        # make sure the last changes of an idle worker are written too
+        with self.lock:
+            if self._timer is None:
+                self._timer = threading.Timer(wait, self._deferred_flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def _deferred_flush(self):
+        with self.lock:
+            self._timer = None
+        self.flush()
+
+    def collect(self):
+        """Snapshots of all processes merged into one"""
+        merged = self.snapshot()
+        directory = self.directory()
+        if directory is None or not directory.is_dir():
+            return merged
+
+        for path in directory.glob("*.json"):
+            pid = int(path.stem) if path.stem.isdigit() else None
+            if pid == os.getpid():
+                continue
+            try:
+                snapshot = json.loads(path.read_text())
+            except (OSError, ValueError):
+                continue
+            alive = pid is not None and _is_alive(pid)
+            for name, metric in snapshot.items():
+                if metric["kind"] == "gauge" and not alive:
+                    continue
+                _merge(merged.setdefault(name, {**metric, "values": []}), metric)
+        return merged
+
+    def exposition(self):
+        lines = []
+        for name, metric in sorted(self.collect().items()):
+            lines.append(f"# HELP {name} {metric['help']}")
+            lines.append(f"# TYPE {name} {metric['kind']}")
+            labelnames = metric["labelnames"]
+            for labels, value in sorted(metric["values"]):
+                pairs = list(zip(labelnames, labels))
+                if metric["kind"] != "histogram":
+                    lines.append(f"{name}{_labels(pairs)} {_number(value)}")
+                    continue
+                counts, total = value
+                cumulative = 0
+                for bound, count in zip([*metric["buckets"], "+Inf"], counts):
+                    cumulative += count
+                    le = bound if bound == "+Inf" else _number(bound)
+                    lines.append(f"{name}_bucket{_labels([*pairs, ('le', le)])} {cumulative}")
+                lines.append(f"{name}_sum{_labels(pairs)} {_number(total)}")
+                lines.append(f"{name}_count{_labels(pairs)} {cumulative}")
+        return "\n".join(lines) + "\n"
+
+
+def fold_snapshot(directory, pid):
+    """
+    Add the counters and histograms of the exited process `pid` to the aggregate file
+    in `directory` and remove its snapshot. Called by the gunicorn master only, which
+    makes it the single writer of the aggregate.
+    """
+    directory = Path(directory)
+    path = directory / f"{pid}.json"
+    try:
+        snapshot = json.loads(path.read_text())
+    except (OSError, ValueError):
+        snapshot = {}
+
+    aggregate_path = directory / AGGREGATE_FILE
+    try:
+        aggregate = json.loads(aggregate_path.read_text())
+    except (OSError, ValueError):
+        aggregate = {}
+    for name, metric in snapshot.items():
+        if metric["kind"] != "gauge":
+            _merge(aggregate.setdefault(name, {**metric, "values": []}), metric)
+
+    temporary = directory / f"{AGGREGATE_FILE}.tmp"
+    temporary.write_text(json.dumps(aggregate))
+    # a scrape between the two steps counts the worker twice, never not at all
+    os.replace(temporary, aggregate_path)
+    path.unlink(missing_ok=True)
+    # left behind by a worker killed while flushing
+    for leftover in directory.glob(f"{pid}-*.tmp"):
+        leftover.unlink(missing_ok=True)
+
+
+def _is_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _merge(target, metric):
+    values = {tuple(labels): value for labels, value in target["values"]}
+    for labels, value in metric["values"]:
+        labels = tuple(labels)
+        current = values.get(labels)
+        if current is None:
+            values[labels] = value
+        elif metric["kind"] == "histogram":
+            counts = [a + b for a, b in zip(current[0], value[0])]
+            values[labels] = [counts, current[1] + value[1]]
+        else:
+            values[labels] = current + value
+    target["values"] = [[list(labels), value] for labels, value in values.items()]
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(pairs):
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+REGISTRY = Registry()
+
+
+class Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=(), registry=REGISTRY):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.registry = registry
+        self.values = {}
+        registry.register(self)
+
+    def key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def snapshot(self):
+        return {
+            "kind": self.kind,
+            "help": self.documentation,
+            "labelnames": list(self.labelnames),
+            "values": [[list(labels), value] for labels, value in self.current_values()],
+        }
+
+    def current_values(self):
+        return list(self.values.items())
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self.key(labels)
+        with self.registry.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+        self.registry.changed()
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS, **kwargs):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames, **kwargs)
+
+    def observe(self, value, **labels):
+        key = self.key(labels)
+        # value <= bound falls into the bucket of bound, the last one is +Inf
+        index = bisect.bisect_left(self.buckets, value)
+        with self.registry.lock:
+            counts, total = self.values.get(key) or ([0] * (len(self.buckets) + 1), 0.0)
+            counts[index] += 1
+            self.values[key] = (counts, total + value)
+        self.registry.changed()
+
+    def snapshot(self):
+        return {**super().snapshot(), "buckets": list(self.buckets)}
+
+    def current_values(self):
+        return [(labels, [list(counts), total]) for labels, (counts, total) in self.values.items()]
+
+
+class Gauge(Metric):
+    """Value computed when collected: `function` returns {label values tuple: value}"""
+
+    kind = "gauge"
+
+    def __init__(self, name, documentation, function, labelnames=(), **kwargs):
+        self.function = function
+        super().__init__(name, documentation, labelnames, **kwargs)
+
+    def current_values(self):
+        return list(self.function().items())
+
+
+# HTTP and database metrics, the api app defines its own next to the code it measures
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "Request latency by endpoint and status class",
+    ["endpoint", "status"],
+)
+
+REQUEST_DB_TIME = Histogram(
+    "http_request_db_seconds",
+    "Time spent in the database per request",
+    ["endpoint"],
+)
+
+DB_CONNECTIONS_OPENED = Counter(
+    "db_connections_opened_total",
+    "New database connections, high rates mean connections are not reused",
+    ["alias"],
+)
+
+
+def _pool_stats():
+    """Usage of Django's psycopg connection pools in this process"""
+    values = {}
+    for alias in connections:
+        pool = getattr(connections[alias], "pool", None)
+        if pool is None or not hasattr(pool, "get_stats"):
+            continue
+        stats = pool.get_stats()
+        for stat in ("pool_size", "pool_available", "requests_waiting"):
+            values[(alias, stat)] = stats.get(stat, 0)
+    return values
+
+
+DB_POOL = Gauge(
+    "db_pool_connections",
+    "Connection pool usage (pool_size, pool_available, requests_waiting)",
+    _pool_stats,
+    ["alias", "stat"],
+)
+
+
+def _connection_created(sender, connection, **kwargs):
+    DB_CONNECTIONS_OPENED.inc(alias=connection.alias)
+
+
+connection_created.connect(_connection_created)
+atexit.register(REGISTRY.flush)
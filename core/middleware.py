@@ -0,0 +1,195 @@
+import random
+import time
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+from accounts.authentication import CustomJWTAuthentication
+
+from .compression import acompress_stream, choose_encoding, compress, compress_stream
+from .instrumentation import endpoint_name, record_queries, record_request
+from .metrics import REQUEST_DB_TIME, REQUEST_LATENCY
+from .profiling import profile_request
+from .routers import replica_reads
+
+PRIMARY_PIN_COOKIE = "primary_pin"
+# for clients without a cookie jar (JWT API clients): echoed back on later requests
+PRIMARY_PIN_HEADER = "X-Primary-Pin"
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+class QueryInstrumentationMiddleware:
+    """
+    Records query count, DB time and total time of every request, aggregated per
+    endpoint in-process (see core.instrumentation.request_stats) and exported as
+    latency histograms (see core.metrics). With
+    QUERY_INSTRUMENTATION_HEADERS on, the numbers are also returned as headers.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        start = time.perf_counter()
+        with record_queries() as recorder:
+            response = self.get_response(request)
+        total = time.perf_counter() - start
+
+        endpoint = endpoint_name(request)
+        record_request(endpoint, recorder.count, recorder.duration, total)
+        REQUEST_LATENCY.observe(
+            total, endpoint=endpoint, status=f"{response.status_code // 100}xx"
+        )
+        REQUEST_DB_TIME.observe(recorder.duration, endpoint=endpoint)
+
+        if settings.QUERY_INSTRUMENTATION_HEADERS:
+            response["X-DB-Query-Count"] = str(recorder.count)
+            response["Server-Timing"] = (
+                f"db;dur={recorder.duration * 1000:.1f}, total;dur={total * 1000:.1f}"
+            )
+        return response
+
+
+class CompressionMiddleware:
+    """
+    Compresses API responses (JSON, YAML and plain text) with brotli or gzip as
+    negotiated through Accept-Encoding (see core.compression). Responses smaller than
+    COMPRESSION_MIN_SIZE bytes are sent as is; streaming responses are always
+    compressed. HTML and responses setting cookies are left alone, compressing secrets
+    next to reflected input would expose them to BREACH.
+    """
+
+    CONTENT_TYPES = ("application/json", "application/yaml", "text/plain")
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if not self.compressible(response):
+            return response
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+        encoding = choose_encoding(request.META.get("HTTP_ACCEPT_ENCODING", ""))
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = acompress_stream(
+                    response.streaming_content, encoding
+                )
+            else:
+                response.streaming_content = compress_stream(
+                    response.streaming_content, encoding
+                )
+            del response.headers["Content-Length"]
+        else:
+            compressed = compress(response.content, encoding)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers["Content-Length"] = str(len(compressed))
+
+        # the compressed bytes differ from those a strong ETag was computed for
+        etag = response.headers.get("ETag")
+        if etag and etag.startswith('"'):
+            response.headers["ETag"] = "W/" + etag
+        response.headers["Content-Encoding"] = encoding
+        return response
+
+    def compressible(self, response):
+        content_type = response.headers.get("Content-Type", "").split(";")[0].strip()
+        return (
+            content_type in self.CONTENT_TYPES
+            and not response.has_header("Content-Encoding")
+            and not response.cookies
+            and (response.streaming or len(response.content) >= settings.COMPRESSION_MIN_SIZE)
+        )
+
+
+class ProfilingMiddleware:
+    """
+    Profiles a request with cProfile (see core.profiling) when a staff user sends the
+    PROFILING_HEADER header, or for a random PROFILING_SAMPLE_RATE share of requests.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.header = "HTTP_" + settings.PROFILING_HEADER.upper().replace("-", "_")
+
+    def __call__(self, request):
+        if self.requested_by_staff(request) or (
+            settings.PROFILING_SAMPLE_RATE
+            and random.random() < settings.PROFILING_SAMPLE_RATE
+        ):
+            return profile_request(request, self.get_response)
+        return self.get_response(request)
+
+    def requested_by_staff(self, request):
+        if not request.META.get(self.header):
+            return False
+        user = getattr(request, "user", None)
+        if user is not None and user.is_staff:
+            return True
+        # API clients authenticate with a JWT, which DRF only checks inside the view
+        authenticated = CustomJWTAuthentication().authenticate(request)
+        return authenticated is not None and authenticated[0].is_staff
+
+
+class ReplicaReadMiddleware:
+    """
+    Marks requests to read-only views so their queries go to a read replica.
+    Views opt in with a `replica_methods` attribute listing the HTTP methods that
+    only read. After a successful write the client is pinned to the primary for
+    REPLICA_PIN_SECONDS so it reads its own writes despite replication lag. The pin
+    is sent as a cookie and as the X-Primary-Pin header, which clients that don't
+    keep cookies send back on their next requests.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = replica_reads.set(False)
+        try:
+            response = self.get_response(request)
+        finally:
+            replica_reads.reset(token)
+
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            if not getattr(request, "replica_read", False):
+                pinned_until = str(int(time.time()) + settings.REPLICA_PIN_SECONDS)
+                response.set_cookie(
+                    PRIMARY_PIN_COOKIE,
+                    pinned_until,
+                    max_age=settings.REPLICA_PIN_SECONDS,
+                    samesite="Lax",
+                )
+                response[PRIMARY_PIN_HEADER] = pinned_until
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if not settings.READ_REPLICAS:
+            return None
+
+        view_class = getattr(view_func, "cls", None)
+        methods = getattr(view_class, "replica_methods", ())
+        if request.method not in methods or self.is_pinned(request):
+            return None
+
+        request.replica_read = True
+        replica_reads.set(True)
+        return None
+
+    def is_pinned(self, request):
+        for pinned_until in (
+            request.COOKIES.get(PRIMARY_PIN_COOKIE),
+            request.headers.get(PRIMARY_PIN_HEADER),
+        ):
+            try:
+                if pinned_until is not None and int(pinned_until) > time.time():
+                    return True
+            except ValueError:
+                pass
+        return False
@@ -0,0 +1,151 @@
+"""
+Opt-in cProfile profiling of single requests.
+
+A request is profiled when a staff user sends the PROFILING_HEADER header or when it is
+picked by PROFILING_SAMPLE_RATE. Each profile is written to PROFILING_DIR as a pstats
+dump (open with `python -m pstats` or snakeviz) next to a JSON summary attributing the
+time to the database, the ORM, serialization and rendering. Only the newest
+PROFILING_MAX_FILES profiles are kept.
+
+The phases overlap: ORM time includes DB time, and querysets evaluated lazily while
+serializing count towards serialization as well.
+
+One request per process is profiled at a time: from Python 3.12 cProfile runs on the
+process-wide sys.monitoring and a second enabled profiler raises ValueError, and before
+that a profile would include the frames of other threads. Requests picked while another
+one is profiled, or while another profiling tool is active, are served unprofiled.
+"""
+
+import cProfile
+import json
+import pstats
+import re
+import threading
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.db.models.sql.compiler import SQLCompiler
+from django.utils import timezone
+from rest_framework.response import Response
+from rest_framework.serializers import BaseSerializer
+
+from .instrumentation import endpoint_name, record_queries
+
+# functions whose cumulative time is reported per phase
+PHASE_FUNCTIONS = {
+    "orm": SQLCompiler.execute_sql,
+    "serialization": BaseSerializer.data.fget,
+    "rendering": Response.rendered_content.fget,
+}
+
+PROFILE_SUFFIX = ".prof"
+SUMMARY_SUFFIX = ".json"
+
+_profiling_lock = threading.Lock()
+
+
+def profile_dir():
+    return Path(settings.PROFILING_DIR)
+
+
+def _function_key(function):
+    code = function.__code__
+    return code.co_filename, code.co_firstlineno, code.co_name
+
+
+def phase_times(stats):
+    """Cumulative seconds spent in each phase according to a pstats.Stats"""
+    times = {}
+    for phase, function in PHASE_FUNCTIONS.items():
+        entry = stats.stats.get(_function_key(function))
+        # (primitive calls, total calls, own time, cumulative time, callers)
+        times[phase] = entry[3] if entry else 0.0
+    return times
+
+
+def profile_request(request, get_response):
+    """Run get_response under cProfile and store the profile; returns the response"""
+    if not _profiling_lock.acquire(blocking=False):
+        return get_response(request)
+    try:
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # another profiling tool is active
+            return get_response(request)
+
+        start = time.perf_counter()
+        with record_queries() as recorder:
+            try:
+                response = get_response(request)
+            finally:
+                profiler.disable()
+        total = time.perf_counter() - start
+    finally:
+        _profiling_lock.release()
+
+    stats = pstats.Stats(profiler)
+    summary = {
+        "endpoint": endpoint_name(request),
+        "path": request.get_full_path(),
+        "status": response.status_code,
+        "created_at": timezone.now().isoformat(),
+        "queries": recorder.count,
+        "ms": {
+            phase: round(seconds * 1000, 2)
+            for phase, seconds in {
+                "total": total,
+                "db": recorder.duration,
+                **phase_times(stats),
+            }.items()
+        },
+    }
+    name = save_profile(profiler, summary)
+    response["X-Profile-Id"] = name
+    return response
+
+
+def save_profile(profiler, summary):
+    directory = profile_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+
+    slug = re.sub(r"[^A-Za-z0-9]+", "-", summary["endpoint"]).strip("-").lower()
+    name = f"{timezone.now():%Y%m%d-%H%M%S-%f}-{slug}"
+    profiler.dump_stats(directory / f"{name}{PROFILE_SUFFIX}")
+    (directory / f"{name}{SUMMARY_SUFFIX}").write_text(json.dumps(summary, indent=2))
+
+    rotate(directory, settings.PROFILING_MAX_FILES)
+    return name
+
+
+def rotate(directory, keep):
+    profiles = sorted(directory.glob(f"*{PROFILE_SUFFIX}"), key=lambda path: path.name)
+    for path in profiles[: max(0, len(profiles) - keep)]:
+        path.unlink(missing_ok=True)
+        path.with_suffix(SUMMARY_SUFFIX).unlink(missing_ok=True)
+
+
+def list_profiles():
+    """Stored profiles, newest first, with their summaries"""
+    directory = profile_dir()
+    if not directory.is_dir():
+        return []
+
+    profiles = []
+    for path in directory.glob(f"*{PROFILE_SUFFIX}"):
+        try:
+            summary = json.loads(path.with_suffix(SUMMARY_SUFFIX).read_text())
+        except (OSError, ValueError):
+            summary = {}
+        profiles.append({"name": path.stem, "size": path.stat().st_size, **summary})
+    return sorted(profiles, key=lambda profile: profile["name"], reverse=True)
+
+
+def profile_path(name):
+    """Path of a stored profile, None for unknown or malformed names"""
+    if not re.fullmatch(r"[A-Za-z0-9-]+", name):
+        return None
+    path = profile_dir() / f"{name}{PROFILE_SUFFIX}"
+    return path if path.is_file() else None
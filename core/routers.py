@@ -0,0 +1,30 @@
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+
+# set by ReplicaReadMiddleware for the duration of a read-only request
+replica_reads = ContextVar("replica_reads", default=False)
+
+
+class ReadReplicaRouter:
+    """
+    Sends reads to a random replica from settings.READ_REPLICAS while the current
+    request is marked read-only; everything else goes to the default database.
+    """
+
+    def db_for_read(self, model, **hints):
+        if replica_reads.get() and settings.READ_REPLICAS:
+            return random.choice(settings.READ_REPLICAS)
+        return "default"
+
+    def db_for_write(self, model, **hints):
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # replicas hold the same data as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # let local replicas (e.g. a second SQLite file) be migrated explicitly
+        return None
@@ -0,0 +1,133 @@
+"""
+OpenAPI schema generated at build time.
+
+`python manage.py export_schema` writes the schema to SCHEMA_DIR as swagger.json and
+swagger.yaml, each with a gzip-compressed copy. The schema endpoints serve those files
+(the compressed copy to clients accepting gzip) with an ETag per encoding, and the Swagger UI and
+ReDoc pages only render their templates, so no request introspects the viewsets and
+serializers. When the files are missing, or with DEBUG where the code changes under
+the running server, the schema is generated once per process on first use instead.
+
+drf_yasg is imported lazily, only by the export command, the fallback generation and
+the documentation pages.
+"""
+
+import gzip
+import hashlib
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+
+from django.conf import settings
+
+SCHEMA_TITLE = "Bus Booking API Doc's"
+SCHEMA_VERSION = "v1.0.0"
+SCHEMA_DESCRIPTION = "This is an API documentation of a Bus Booking System"
+
+# format suffix (as in swagger<format>/) -> content type
+SCHEMA_FORMATS = {
+    ".json": "application/json",
+    ".yaml": "application/yaml",
+}
+
+
+@dataclass(frozen=True)
+class SchemaFile:
+    body: bytes
+    gzipped: bytes
+    etag: str
+    # strong validators must differ between representations
+    gzip_etag: str
+
+
+def schema_dir():
+    return Path(settings.SCHEMA_DIR)
+
+
+def schema_info():
+    from drf_yasg import openapi
+
+    return openapi.Info(
+        title=SCHEMA_TITLE,
+        default_version=SCHEMA_VERSION,
+        description=SCHEMA_DESCRIPTION,
+    )
+
+
+def generate_schema():
+    """The public schema of all endpoints as a drf_yasg Swagger object"""
+    from drf_yasg.generators import OpenAPISchemaGenerator
+
+    # without a request the host is left out and clients use the one serving the file
+    generator = OpenAPISchemaGenerator(info=schema_info())
+    return generator.get_schema(request=None, public=True)
+
+
+def encode_schema(swagger, suffix):
+    from drf_yasg.codecs import OpenAPICodecJson, OpenAPICodecYaml
+
+    codec = OpenAPICodecJson if suffix == ".json" else OpenAPICodecYaml
+    return codec(validators=[]).encode(swagger)
+
+
+def compress(body):
+    # mtime=0 keeps the output identical between builds of the same schema
+    return gzip.compress(body, compresslevel=9, mtime=0)
+
+
+def export_schema(directory=None):
+    """Write all formats and their compressed copies; returns the written paths"""
+    directory = Path(directory or schema_dir())
+    directory.mkdir(parents=True, exist_ok=True)
+
+    swagger = generate_schema()
+    paths = []
+    for suffix in SCHEMA_FORMATS:
+        body = encode_schema(swagger, suffix)
+        path = directory / f"swagger{suffix}"
+        _write(path, body)
+        _write(path.with_name(f"{path.name}.gz"), compress(body))
+        paths += [path, path.with_name(f"{path.name}.gz")]
+    _loaded.clear()
+    return paths
+
+
+def _write(path, content):
+    # written aside and renamed so running workers never read a partial file
+    temporary = path.with_name(f"{path.name}.tmp")
+    temporary.write_bytes(content)
+    temporary.replace(path)
+
+
+_loaded = {}
+_lock = threading.Lock()
+
+
+def load_schema(suffix):
+    """The schema in the given format, read from SCHEMA_DIR or generated once"""
+    schema = _loaded.get(suffix)
+    if schema is not None:
+        return schema
+
+    with _lock:
+        if suffix not in _loaded:
+            path = schema_dir() / f"swagger{suffix}"
+            if path.is_file() and not settings.DEBUG:
+                body = path.read_bytes()
+                compressed = path.with_name(f"{path.name}.gz")
+                gzipped = compressed.read_bytes() if compressed.is_file() else compress(body)
+            else:
+                body = encode_schema(generate_schema(), suffix)
+                gzipped = compress(body)
+            digest = hashlib.md5(body).hexdigest()
+            _loaded[suffix] = SchemaFile(body, gzipped, f'"{digest}"', f'"{digest}-gzip"')
+        return _loaded[suffix]
+
+
+def render_ui(request, renderer_class):
+    """HTML of a drf_yasg documentation page, pointing at the exported schema"""
+    from drf_yasg import openapi
+
+    # the templates only need the title and version, the page fetches the schema
+    swagger = openapi.Swagger(info=schema_info(), _prefix="/", paths=openapi.Paths({}))
+    return renderer_class().render(swagger, renderer_context={"request": request})
@@ -0,0 +1,250 @@
+"""
+Slow query log.
+
+Every database connection gets an execute_wrapper that times queries. Queries slower
+than SLOW_QUERY_THRESHOLD_MS are logged to the `core.slowlog` logger with a normalized
+fingerprint (literals and placeholders replaced, IN lists collapsed), the call site in
+project code (and the serializer being rendered, if any) and redacted parameters
+(only their types are kept).
+
+Per-fingerprint totals are kept for a rolling window of SLOW_QUERY_WINDOW_MINUTES in
+each process (see slow_query_stats) and exported as metrics, which aggregate across
+worker processes.
+"""
+
+import hashlib
+import logging
+import re
+import sys
+import threading
+import time
+from collections import Counter, deque
+from pathlib import Path
+
+from django.conf import settings
+from rest_framework.serializers import BaseSerializer, ListSerializer
+from rest_framework.views import APIView
+
+from .metrics import Counter as MetricCounter
+
+logger = logging.getLogger(__name__)
+
+SLOW_QUERIES = MetricCounter(
+    "db_slow_queries_total",
+    "Queries slower than SLOW_QUERY_THRESHOLD_MS by fingerprint and call site",
+    ["fingerprint", "call_site"],
+)
+SLOW_QUERY_SECONDS = MetricCounter(
+    "db_slow_query_seconds_total",
+    "Time spent in slow queries by fingerprint and call site",
+    ["fingerprint", "call_site"],
+)
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"(?<![\w\"])-?\d+(?:\.\d+)?\b")
+_PLACEHOLDER = re.compile(r"%s|\?")
+_IN_LIST = re.compile(r"\bIN \((?:\?(?:, )?)+\)", re.IGNORECASE)
+_VALUES_LIST = re.compile(r"VALUES (\([^()]*\))(?:, \([^()]*\))+", re.IGNORECASE)
+_SAVEPOINT = re.compile(r'"s\d+_x\d+"')
+_WHITESPACE = re.compile(r"\s+")
+
+# request plumbing, never reported as the call site
+_IGNORED_FILES = {
+    str(Path(__file__).with_name(name))
+    for name in ("slowlog.py", "instrumentation.py", "middleware.py", "profiling.py")
+}
+
+
+def normalize(sql):
+    """SQL with literals and parameters replaced so equal statements compare equal"""
+    sql = _WHITESPACE.sub(" ", sql.strip())
+    sql = _STRING.sub("?", sql)
+    sql = _NUMBER.sub("?", sql)
+    sql = _PLACEHOLDER.sub("?", sql)
+    sql = _IN_LIST.sub("IN (...)", sql)
+    sql = _VALUES_LIST.sub(r"VALUES \1, ...", sql)
+    return _SAVEPOINT.sub('"?"', sql)
+
+
+def fingerprint(normalized_sql):
+    return hashlib.md5(normalized_sql.encode()).hexdigest()[:12]
+
+
+def redact(params, many=False):
+    """Parameter types only, values may contain personal data"""
+    if params is None:
+        return None
+    if many:
+        params = list(params)
+        return f"{len(params)} rows of {redact(params[0]) if params else '[]'}"
+    if isinstance(params, dict):
+        return {key: type(value).__name__ for key, value in params.items()}
+    return [type(value).__name__ for value in params]
+
+
+def call_site():
+    """
+    Where a query comes from: the innermost frame in project code as
+    "path:line in function" (or the DRF view method when the query is issued by
+    generic view code), plus the innermost serializer on the stack if any.
+    Returns (call site, metric label): the label has no line number, which changes
+    with every edit and would add metric series without bound.
+    """
+    base_dir = str(settings.BASE_DIR)
+    site = label = view = serializer = None
+    frame = sys._getframe(1)
+    while frame is not None and site is None:
+        filename = frame.f_code.co_filename
+        instance = frame.f_locals.get("self")
+        if (
+            filename.startswith(base_dir)
+            and filename not in _IGNORED_FILES
+            and "site-packages" not in filename
+        ):
+            relative = Path(filename).relative_to(base_dir)
+            site = f"{relative}:{frame.f_lineno} in {frame.f_code.co_name}"
+            label = f"{relative} in {frame.f_code.co_name}"
+        elif view is None and isinstance(instance, APIView):
+            view = f"{type(instance).__name__}.{frame.f_code.co_name}"
+
+        if serializer is None and isinstance(instance, ListSerializer):
+            serializer = f"{type(instance.child).__name__}(many=True)"
+        elif serializer is None and isinstance(instance, BaseSerializer):
+            serializer = type(instance).__name__
+        frame = frame.f_back
+
+    suffix = f" ({serializer})" if serializer else ""
+    return f"{view or site or 'unknown'}{suffix}", f"{view or label or 'unknown'}{suffix}"
+
+
+class SlowQueryStats:
+    """Per-fingerprint totals in one-minute buckets, dropped after `window` minutes"""
+
+    def __init__(self, window_minutes, max_fingerprints=500):
+        self.window = window_minutes
+        self.max_fingerprints = max_fingerprints
+        self.buckets = deque()  # (minute, {fingerprint: entry})
+        self.lock = threading.Lock()
+
+    def add(self, fingerprint, sql, duration, site):
+        minute = int(time.time() // 60)
+        with self.lock:
+            if not self.buckets or self.buckets[-1][0] != minute:
+                self.buckets.append((minute, {}))
+            while self.buckets and self.buckets[0][0] <= minute - self.window:
+                self.buckets.popleft()
+
+            entries = self.buckets[-1][1]
+            entry = entries.get(fingerprint)
+            if entry is None:
+                if len(entries) >= self.max_fingerprints:
+                    return
+                entry = entries[fingerprint] = {
+                    "sql": sql,
+                    "count": 0,
+                    "total": 0.0,
+                    "max": 0.0,
+                    "call_sites": Counter(),
+                }
+            entry["count"] += 1
+            entry["total"] += duration
+            entry["max"] = max(entry["max"], duration)
+            entry["call_sites"][site] += 1
+
+    def top(self, limit=20):
+        """Fingerprints of the window ordered by total time"""
+        minute = int(time.time() // 60)
+        merged = {}
+        with self.lock:
+            for bucket_minute, entries in self.buckets:
+                if bucket_minute <= minute - self.window:
+                    continue
+                for key, entry in entries.items():
+                    total = merged.setdefault(
+                        key,
+                        {
+                            "fingerprint": key,
+                            "sql": entry["sql"],
+                            "count": 0,
+                            "total": 0.0,
+                            "max": 0.0,
+                            "call_sites": Counter(),
+                        },
+                    )
+                    total["count"] += entry["count"]
+                    total["total"] += entry["total"]
+                    total["max"] = max(total["max"], entry["max"])
+                    total["call_sites"].update(entry["call_sites"])
+
+        ranked = sorted(merged.values(), key=lambda entry: entry["total"], reverse=True)
+        for entry in ranked:
+            entry["mean"] = entry["total"] / entry["count"]
+            entry["call_sites"] = entry["call_sites"].most_common(5)
+        return ranked[:limit]
+
+    def clear(self):
+        with self.lock:
+            self.buckets.clear()
+
+
+_stats = None
+_stats_lock = threading.Lock()
+
+
+def get_stats():
+    global _stats
+    with _stats_lock:
+        if _stats is None:
+            _stats = SlowQueryStats(settings.SLOW_QUERY_WINDOW_MINUTES)
+        return _stats
+
+
+def slow_query_stats(limit=20):
+    """Slowest fingerprints of this process over the rolling window, by total time"""
+    return get_stats().top(limit)
+
+
+class SlowQueryLogger:
+    """execute_wrapper logging queries slower than the threshold"""
+
+    def __init__(self, threshold):
+        self.threshold = threshold
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            if duration >= self.threshold:
+                self.record(sql, params, many, duration, context["connection"].alias)
+
+    def record(self, sql, params, many, duration, alias):
+        normalized = normalize(sql)
+        key = fingerprint(normalized)
+        location, label = call_site()
+
+        get_stats().add(key, normalized, duration, location)
+        SLOW_QUERIES.inc(fingerprint=key, call_site=label)
+        SLOW_QUERY_SECONDS.inc(duration, fingerprint=key, call_site=label)
+        logger.warning(
+            "slow query %s %.1fms on %s at %s: %s params=%s",
+            key,
+            duration * 1000,
+            alias,
+            location,
+            normalized,
+            redact(params, many),
+        )
+
+
+def install(sender=None, connection=None, **kwargs):
+    """connection_created receiver adding the slow query logger to a connection"""
+    threshold = settings.SLOW_QUERY_THRESHOLD_MS
+    if threshold is None or connection is None:
+        return
+    # the wrapper object outlives its database connections, add the logger once
+    if any(isinstance(wrapper, SlowQueryLogger) for wrapper in connection.execute_wrappers):
+        return
+    # first in the list: execute_wrapper() blocks pop the last entry when they exit
+    connection.execute_wrappers.insert(0, SlowQueryLogger(threshold / 1000))
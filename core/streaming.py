@@ -0,0 +1,70 @@
+"""
+Streaming JSON responses for large list endpoints.
+
+StreamingListMixin makes a viewset's list action send its JSON array in chunks: rows
+are read with QuerySet.iterator() and every `stream_chunk_size` rows are serialized
+and rendered before the next ones are fetched, so the memory a request needs stays
+flat however long the list is. The bytes are the same as those of the buffered
+response.
+
+Paginated lists, indented output and other renderers (the browsable API) get the
+regular response. Streamed rows are read after the view and the middleware returned:
+their queries don't count towards the request's query metrics, and an error after the
+first chunk can only abort the response.
+"""
+
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+from rest_framework.renderers import JSONRenderer
+
+
+class StreamingListMixin:
+    stream_chunk_size = 500
+
+    def list(self, request, *args, **kwargs):
+        renderer = request.accepted_renderer
+        renderer_context = self.get_renderer_context()
+        if (
+            self.paginator is not None
+            or not isinstance(renderer, JSONRenderer)
+            or renderer.get_indent(request.accepted_media_type, renderer_context) is not None
+        ):
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        # pick the database (e.g. a read replica) while the request's routing applies
+        queryset = queryset.using(queryset.db)
+        content = self.stream_json(queryset, renderer, renderer_context)
+        if isinstance(request._request, ASGIRequest):
+            # sync iterators are read into memory as a whole under ASGI
+            content = iterate_in_thread(content)
+        return StreamingHttpResponse(content, content_type=renderer.media_type)
+
+    def stream_json(self, queryset, renderer, renderer_context):
+        rows = queryset.iterator(chunk_size=self.stream_chunk_size)
+        # one serializer for all chunks: serializers reference themselves through their
+        # fields, rows held by a serializer per chunk would only be freed by the
+        # cyclic garbage collector
+        serializer = self.get_serializer(many=True)
+        yield b"["
+        separator = b""
+        while chunk := list(islice(rows, self.stream_chunk_size)):
+            data = serializer.to_representation(chunk)
+            # the items of the rendered chunk without the surrounding brackets
+            yield separator + renderer.render(data, renderer_context=renderer_context)[1:-1]
+            separator = b","
+        yield b"]"
+
+
+async def iterate_in_thread(iterator):
+    """Async iterator over a sync one, advanced in the thread the view ran in"""
+    next_chunk = sync_to_async(next, thread_sensitive=True)
+    try:
+        while (chunk := await next_chunk(iterator, None)) is not None:
+            yield chunk
+    finally:
+        # release the database cursor if the client went away
+        await sync_to_async(iterator.close, thread_sensitive=True)()
@@ -0,0 +1,23 @@
+from contextlib import contextmanager
+
+from django.db import connections
+from django.test.utils import CaptureQueriesContext
+
+
+class QueryBudgetMixin:
+    """TestCase mixin that fails when a block of code issues more queries than allowed"""
+
+    @contextmanager
+    def assertQueryBudget(self, name, budget, using="default"):
+        with CaptureQueriesContext(connections[using]) as context:
+            yield context
+
+        executed = len(context.captured_queries)
+        if executed > budget:
+            queries = "\n".join(
+                f"{index}. {query['sql']}"
+                for index, query in enumerate(context.captured_queries, start=1)
+            )
+            self.fail(
+                f"{name} issued {executed} queries, budget is {budget}:\n{queries}"
+            )
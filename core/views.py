@@ -0,0 +1,96 @@
+import hmac
+import re
+
+from django.conf import settings
+from django.contrib import admin
+from django.http import (
+    FileResponse,
+    Http404,
+    HttpResponse,
+    HttpResponseForbidden,
+    HttpResponseNotModified,
+)
+from django.template.response import TemplateResponse
+from django.utils.cache import patch_cache_control, patch_vary_headers
+
+from .metrics import REGISTRY
+from .profiling import list_profiles, profile_path
+from .schema import SCHEMA_FORMATS, load_schema, render_ui
+
+ACCEPTS_GZIP = re.compile(r"\bgzip\b")
+LOOPBACK_ADDRESSES = ("127.0.0.1", "::1")
+
+
+def metrics_allowed(request):
+    if settings.METRICS_TOKEN:
+        expected = f"Bearer {settings.METRICS_TOKEN}"
+        return hmac.compare_digest(request.headers.get("Authorization", ""), expected)
+    # without a token only a scraper on the same host, not requests relayed by a local proxy
+    return (
+        request.META.get("REMOTE_ADDR") in LOOPBACK_ADDRESSES
+        and "X-Forwarded-For" not in request.headers
+    )
+
+
+def metrics(request):
+    """Prometheus text exposition of the metrics of all worker processes"""
+    if not metrics_allowed(request):
+        return HttpResponseForbidden()
+    return HttpResponse(
+        REGISTRY.exposition(), content_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
+def profile_list(request):
+    context = {
+        **admin.site.each_context(request),
+        "title": "Request profiles",
+        "profiles": list_profiles(),
+    }
+    return TemplateResponse(request, "admin/profiles.html", context)
+
+
+def profile_download(request, name):
+    path = profile_path(name)
+    if path is None:
+        raise Http404("Profile not found")
+    return FileResponse(path.open("rb"), as_attachment=True, filename=path.name)
+
+
+def schema(request, format):
+    """The exported OpenAPI schema, gzip-compressed when the client accepts it"""
+    if format not in SCHEMA_FORMATS:
+        raise Http404("Unknown schema format")
+    schema_file = load_schema(format)
+    if ACCEPTS_GZIP.search(request.headers.get("Accept-Encoding", "")):
+        body, etag, encoding = schema_file.gzipped, schema_file.gzip_etag, "gzip"
+    else:
+        body, etag, encoding = schema_file.body, schema_file.etag, None
+
+    # CompressionMiddleware weakens the ETag of responses it compresses
+    if request.headers.get("If-None-Match", "").removeprefix("W/") == etag:
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(body, content_type=SCHEMA_FORMATS[format])
+        if encoding:
+            response["Content-Encoding"] = encoding
+    response["ETag"] = etag
+    # clients revalidate, unchanged schemas cost a 304
+    patch_cache_control(response, public=True, no_cache=True)
+    patch_vary_headers(response, ("Accept-Encoding",))
+    return response
+
+
+def swagger_ui(request):
+    # ?format=openapi is where drf_yasg used to serve the schema
+    if request.GET.get("format") == "openapi":
+        return schema(request, ".json")
+    from drf_yasg.renderers import SwaggerUIRenderer
+
+    return HttpResponse(render_ui(request, SwaggerUIRenderer))
+
+
+def redoc(request):
+    from drf_yasg.renderers import ReDocRenderer
+
+    return HttpResponse(render_ui(request, ReDocRenderer))
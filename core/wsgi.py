@@ -14,3 +14,13 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
 
 application = get_wsgi_application()
+
+# build the route catalog snapshot before the first request
+from api.catalog import warm_catalog_on_startup  # noqa: E402
+
+warm_catalog_on_startup()
+
+# import the URLconf and views now rather than on each worker's first request
+from django.urls import get_resolver  # noqa: E402
+
+get_resolver().url_patterns
@@ -0,0 +1,104 @@
+"""
+Gunicorn server profile, picked up automatically when running `gunicorn` from the
+project root. Every value can be overridden with the environment variables below
+or on the command line.
+
+    gunicorn                          # WSGI, threaded workers
+    GUNICORN_ASGI=True gunicorn       # ASGI (core.asgi) on uvicorn workers
+
+The application is imported once in the master (preload_app) so workers fork with
+Django, the URLconf and the route catalog snapshot already loaded and share those
+pages copy-on-write; the hooks below drop state that must not cross the fork.
+"""
+
+import multiprocessing
+import os
+import sys
+from pathlib import Path
+
+
+def env_bool(name, default):
+    return os.getenv(name, str(default)) == "True"
+
+
+cores = multiprocessing.cpu_count()
+asgi = env_bool("GUNICORN_ASGI", False)
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8000")
+
+if asgi:
+    wsgi_app = "core.asgi:application"
+    # uvicorn.workers is deprecated, the worker lives in the uvicorn-worker package
+    worker_class = "uvicorn_worker.UvicornWorker"
+    # one event loop per worker, sync views run in its thread pool
+    workers = int(os.getenv("WEB_CONCURRENCY", cores + 1))
+    threads = 1
+else:
+    wsgi_app = "core.wsgi:application"
+    # requests mostly wait on the database, threads overlap that wait cheaply
+    threads = int(os.getenv("GUNICORN_THREADS", 4))
+    worker_class = "gthread" if threads > 1 else "sync"
+    workers = int(os.getenv("WEB_CONCURRENCY", 2 * cores + 1))
+
+preload_app = env_bool("GUNICORN_PRELOAD", True)
+
+# keep connections from the load balancer open between requests
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", 5))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 30))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", 30))
+
+# recycle workers to bound memory growth, jittered so they don't restart together
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", 2000))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", max_requests // 10))
+
+# heartbeat files on tmpfs, a slow disk otherwise stalls workers
+if os.path.isdir("/dev/shm"):
+    worker_tmp_dir = "/dev/shm"
+
+accesslog = os.getenv("GUNICORN_ACCESS_LOG", "-")
+errorlog = "-"
+loglevel = os.getenv("GUNICORN_LOG_LEVEL", "info")
+
+
+def on_starting(server):
+    # metric files of the previous deployment would be summed with the new ones
+    # only the snapshot files core.metrics writes, METRICS_DIR may hold other files
+    metrics_dir = os.getenv("METRICS_DIR")
+    if metrics_dir and Path(metrics_dir).is_dir():
+        for pattern in ("*.json", "*.tmp"):
+            for path in Path(metrics_dir).glob(pattern):
+                path.unlink(missing_ok=True)
+
+
+def post_fork(server, worker):
+    if not server.cfg.preload_app:
+        return
+
+    from django.db import connections
+
+    from core.metrics import REGISTRY
+
+    # a connection opened in the master (catalog warm-up) must not be shared
+    connections.close_all()
+    # values recorded in the master are not this worker's
+    REGISTRY.reset()
+
+
+def worker_exit(server, worker):
+    if "core.metrics" not in sys.modules:
+        return
+    from core.metrics import REGISTRY
+
+    REGISTRY.flush()
+
+
+def child_exit(server, worker):
+    # runs in the master once the worker is gone: fold its snapshot into the aggregate
+    # so recycled workers (max_requests) don't leave one file each in METRICS_DIR
+    metrics_dir = os.getenv("METRICS_DIR")
+    if not metrics_dir or not Path(metrics_dir).is_dir():
+        return
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
+    from core.metrics import fold_snapshot
+
+    fold_snapshot(metrics_dir, worker.pid)